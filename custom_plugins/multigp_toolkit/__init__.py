@@ -186,3 +186,27 @@ def register_global_options(rhapi: RHAPI) -> None:
         private=True,
     )
     rhapi.fields.register_option(apikey_field, "multigp_set")
+
+    fpvs_compress = UIField(
+        name="fpvs_compress",
+        label="Compress FPVScores Uploads",
+        field_type=UIFieldType.CHECKBOX,
+        desc=(
+            "Gzip the full FPVScores upload. Only enable if FPVScores "
+            "accepts compressed uploads."
+        ),
+        value="0",
+    )
+    rhapi.fields.register_option(fpvs_compress, "multigp_set")
+
+    fpvs_partial = UIField(
+        name="fpvs_partial_leaderboard",
+        label="Partial FPVScores Leaderboards",
+        field_type=UIFieldType.CHECKBOX,
+        desc=(
+            "Only upload the leaderboard rows that changed after a race is saved. "
+            "Only enable if FPVScores merges partial leaderboards."
+        ),
+        value="0",
+    )
+    rhapi.fields.register_option(fpvs_partial, "multigp_set")
@@ -2,14 +2,26 @@
 Data manager abstraction
 """
 
+import hashlib
+import itertools
+import json
 import logging
+import os
+import random
 import time
+import zlib
+from collections import deque
+from collections.abc import Generator, Iterable
+from dataclasses import dataclass
+from pathlib import Path
 from typing import TypeVar, Union
 
+import gevent
+import gevent.event
 import requests
 from RHAPI import RHAPI
 
-from .enums import RequestAction
+from .enums import BreakerState, RequestAction
 
 logger = logging.getLogger(__name__)
 """Module logger"""
@@ -17,6 +29,402 @@ logger = logging.getLogger(__name__)
 U = TypeVar("U", bound=Union[bool, str, int, dict])
 """Generic used for typing"""
 
+STREAM_CHUNK_SIZE = 65536
+"""Approximate size in bytes of each chunk in a streamed request body"""
+DOWNLOAD_CHUNK_SIZE = 65536
+"""Size in bytes of each chunk read from a downloaded file"""
+COMPRESSION_THRESHOLD = 1024
+"""Minimum body size in bytes before a request body is compressed"""
+COMPRESSION_REJECTED = 415
+"""Response status code for a server rejecting a compressed body"""
+RETRY_STATUS = (408, 429)
+"""Response status codes, in addition to 5xx, that are safe to retry"""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Retry behavior for a request
+    """
+
+    retries: int = 2
+    """Number of additional attempts after the first request fails"""
+    backoff_base: float = 0.5
+    """Delay in seconds used as the base for the exponential backoff"""
+    backoff_max: float = 8.0
+    """Maximum delay in seconds between attempts"""
+    idempotent: bool = True
+    """Whether the request can be safely repeated. Non-idempotent requests
+    are only retried on connection errors, where the request was not processed,
+    and never on timeouts or server errors"""
+
+    def delay(self, attempt: int) -> float:
+        """
+        Get the delay before the next attempt using exponential backoff
+        with full jitter
+
+        :param attempt: The number of retries already made
+        :return: The delay in seconds
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+@dataclass
+class _BodyStats:
+    """
+    Size of a request body before and after compression
+    """
+
+    raw: int = 0
+    """Number of bytes before compression"""
+    sent: int = 0
+    """Number of bytes sent to the server"""
+
+
+def _iter_json(
+    payload: object, encoder: type[json.JSONEncoder]
+) -> Generator[str, None, None]:
+    """
+    Lazily encodes a payload as compact JSON. The top level of the payload
+    and any top level lists are walked so that only a single element is
+    encoded at a time.
+
+    :param payload: The object to encode
+    :param encoder: The encoder class to use
+    :yield: Encoded fragments of the payload
+    """
+    encode = encoder(separators=(",", ":")).encode
+
+    if not isinstance(payload, dict):
+        yield encode(payload)
+        return
+
+    yield "{"
+    for index, (key, value) in enumerate(payload.items()):
+        if index:
+            yield ","
+
+        yield f"{encode(str(key))}:"
+
+        if isinstance(value, (list, tuple)):
+            yield "["
+            for index_, item in enumerate(value):
+                if index_:
+                    yield ","
+                yield encode(item)
+            yield "]"
+        else:
+            yield encode(value)
+
+    yield "}"
+
+
+def _iter_chunks(fragments: Generator[str, None, None]) -> Generator[bytes, None, None]:
+    """
+    Joins encoded fragments into chunks of roughly `STREAM_CHUNK_SIZE` bytes
+
+    :param fragments: The fragments to join
+    :yield: The encoded chunks
+    """
+    buffer: list[str] = []
+    size = 0
+
+    for fragment in fragments:
+        buffer.append(fragment)
+        size += len(fragment)
+
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(buffer).encode()
+            buffer.clear()
+            size = 0
+
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised when a request is rejected by an open circuit breaker
+    """
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of recent requests to stop contacting a
+    failing service. The breaker opens when the failure rate of recent
+    requests passes a threshold, then allows probe requests through after
+    a timeout to detect when the service has recovered.
+    """
+
+    def __init__(
+        self,
+        window: int = 10,
+        min_requests: int = 3,
+        failure_rate: float = 0.5,
+        reset_timeout: float = 15.0,
+        max_reset_timeout: float = 300.0,
+        half_open_probes: int = 1,
+    ):
+        """
+        Class initalization
+
+        :param window: Number of recent requests used to calculate the failure rate
+        :param min_requests: Minimum number of requests in the window before opening
+        :param failure_rate: Failure rate that opens the breaker
+        :param reset_timeout: Seconds to stay open before allowing a probe request
+        :param max_reset_timeout: Upper limit for the open timeout. The timeout
+        doubles each time a probe fails.
+        :param half_open_probes: Number of probe requests allowed at once
+        """
+        # pylint: disable=R0913
+
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        """Recent request outcomes. `True` for a success"""
+        self._min_requests = min_requests
+        """Minimum number of requests in the window before opening"""
+        self._failure_rate = failure_rate
+        """Failure rate that opens the breaker"""
+        self._base_timeout = reset_timeout
+        """Initial open timeout"""
+        self._max_timeout = max_reset_timeout
+        """Upper limit of the open timeout"""
+        self._reset_timeout = reset_timeout
+        """Current open timeout"""
+        self._half_open_probes = half_open_probes
+        """Number of probe requests allowed at once"""
+        self._probes = 0
+        """Number of probe requests in progress"""
+        self._state = BreakerState.CLOSED
+        """Current state of the breaker"""
+        self._opened_at = 0.0
+        """Time the breaker was last opened"""
+
+    @property
+    def state(self) -> BreakerState:
+        """
+        The current state of the breaker
+        """
+        if (
+            self._state == BreakerState.OPEN
+            and time.monotonic() - self._opened_at >= self._reset_timeout
+        ):
+            self._state = BreakerState.HALF_OPEN
+            self._probes = 0
+
+        return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Check if a request should be sent. Reserves a probe when half-open.
+
+        :return: Whether the request can be sent
+        """
+        state = self.state
+
+        if state == BreakerState.CLOSED:
+            return True
+
+        if state == BreakerState.HALF_OPEN and self._probes < self._half_open_probes:
+            self._probes += 1
+            return True
+
+        return False
+
+    def _open(self) -> None:
+        """
+        Opens the breaker
+        """
+        self._state = BreakerState.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def record_success(self) -> None:
+        """
+        Record a successful request
+        """
+        if self._state == BreakerState.HALF_OPEN:
+            self._state = BreakerState.CLOSED
+            self._reset_timeout = self._base_timeout
+            self._outcomes.clear()
+        else:
+            self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        """
+        Record a failed request
+        """
+        if self._state == BreakerState.HALF_OPEN:
+            self._reset_timeout = min(self._reset_timeout * 2, self._max_timeout)
+            self._open()
+            return
+
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+
+        if (
+            len(self._outcomes) >= self._min_requests
+            and failures / len(self._outcomes) >= self._failure_rate
+        ):
+            self._open()
+
+    def release(self) -> None:
+        """
+        Release a reserved probe without recording an outcome
+        """
+        if self._state == BreakerState.HALF_OPEN and self._probes:
+            self._probes -= 1
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit sized from observed request latency and errors using
+    additive increase, multiplicative decrease (AIMD). The limit grows by
+    roughly one for each full window of fast, successful requests and is halved
+    when a request fails or its latency rises well above the observed baseline.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 32,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.5,
+    ):
+        """
+        Class initalization
+
+        :param initial: The starting limit
+        :param minimum: The lowest allowed limit
+        :param maximum: The highest allowed limit
+        :param latency_tolerance: Multiple of the baseline latency treated as
+        congestion
+        :param backoff: Factor applied to the limit when decreasing
+        """
+        # pylint: disable=R0913
+
+        self._limit = float(initial)
+        """Current concurrency limit"""
+        self._minimum = minimum
+        """Lowest allowed limit"""
+        self._maximum = maximum
+        """Highest allowed limit"""
+        self._latency_tolerance = latency_tolerance
+        """Multiple of the baseline latency treated as congestion"""
+        self._backoff = backoff
+        """Factor applied to the limit when decreasing"""
+        self._baseline: Union[float, None] = None
+        """Smoothed minimum observed latency"""
+        self._last_decrease = 0.0
+        """Time of the last decrease"""
+        self._in_flight = 0
+        """Number of requests currently holding the limiter"""
+        self._released = gevent.event.Event()
+        """Set when a request releases the limiter"""
+
+    @property
+    def limit(self) -> int:
+        """
+        The current concurrency limit
+        """
+        return int(self._limit)
+
+    def acquire(self) -> None:
+        """
+        Wait until the number of requests in flight is under the limit
+        """
+        while self._in_flight >= self.limit:
+            self._released.clear()
+            self._released.wait()
+
+        self._in_flight += 1
+
+    def release(self) -> None:
+        """
+        Release a slot acquired with `acquire`
+        """
+        self._in_flight -= 1
+        self._released.set()
+
+    def observe(self, latency: float, success: bool) -> None:
+        """
+        Adjust the limit based on the outcome of a request
+
+        :param latency: The request latency in seconds
+        :param success: Whether the request succeeded
+        """
+        previous = self.limit
+
+        if success and (self._baseline is None or latency < self._baseline):
+            self._baseline = latency
+
+        if not success or latency > self._baseline * self._latency_tolerance:
+            now = time.monotonic()
+            # Only decrease once per round-trip so a burst of failures
+            # from the same window does not collapse the limit
+            if now - self._last_decrease > (self._baseline or latency):
+                self._limit = max(self._minimum, self._limit * self._backoff)
+                self._last_decrease = now
+        else:
+            self._baseline += (latency - self._baseline) * 0.05
+            self._limit = min(self._maximum, self._limit + 1 / self._limit)
+
+        if self.limit != previous:
+            logger.debug("Concurrency limit changed to %s", self.limit)
+
+
+def _count_chunks(
+    chunks: Iterable[bytes], stats: _BodyStats
+) -> Generator[bytes, None, None]:
+    """
+    Passes chunks through while recording their size
+
+    :param chunks: The chunks of the body
+    :param stats: The stats to record the size into
+    :yield: The unmodified chunks
+    """
+    for chunk in chunks:
+        stats.raw += len(chunk)
+        stats.sent += len(chunk)
+        yield chunk
+
+
+def _gzip_chunks(
+    chunks: Iterable[bytes], stats: _BodyStats
+) -> Generator[bytes, None, None]:
+    """
+    Compresses chunks into a gzip stream while recording their size
+
+    :param chunks: The chunks of the body
+    :param stats: The stats to record the size into
+    :yield: The compressed chunks
+    """
+    compressor = zlib.compressobj(wbits=31)
+
+    for chunk in chunks:
+        stats.raw += len(chunk)
+        if data := compressor.compress(chunk):
+            stats.sent += len(data)
+            yield data
+
+    data = compressor.flush()
+    stats.sent += len(data)
+    yield data
+
+
+def _rejects_compression(response: requests.Response) -> bool:
+    """
+    Check if a response rejected the compressed body of the request. A 400
+    response is only treated as a rejection when it names the encoding.
+
+    :param response: The server response
+    :return: Whether the compressed body was rejected
+    """
+    if response.status_code == COMPRESSION_REJECTED:
+        return True
+
+    return response.status_code == 400 and "encoding" in response.text.lower()
+
 
 class _APIManager:
     """
@@ -26,11 +434,21 @@ class _APIManager:
     # pylint: disable=R0903
 
     _connected: Union[bool, None] = None
-    """Whether the system is able to connect to the API"""
+    """Whether the last request reached the API. `None` until the
+    first request is made"""
 
     _session: requests.Session
     """Session for API requests"""
 
+    _retry_policies: dict[RequestAction, RetryPolicy] = {
+        RequestAction.GET: RetryPolicy(),
+        RequestAction.PUT: RetryPolicy(),
+        RequestAction.DELETE: RetryPolicy(),
+        RequestAction.POST: RetryPolicy(retries=1, idempotent=False),
+        RequestAction.PATCH: RetryPolicy(retries=1, idempotent=False),
+    }
+    """Retry policy for each request type"""
+
     def __init__(self, rhapi: RHAPI, headers: Union[dict[str, str], None] = None):
         """
         Class initalization
@@ -45,6 +463,196 @@ class _APIManager:
         """Session to use for API requests"""
         self._session.headers = headers
 
+        self._uncompressed_endpoints: set[str] = set()
+        """Endpoints that have rejected compressed request bodies"""
+
+        self._breaker = CircuitBreaker()
+        """Circuit breaker shared by all requests to the API"""
+        self.limiter = AdaptiveLimiter()
+        """Concurrency limit for parallel requests to the API"""
+
+    @property
+    def circuit_open(self) -> bool:
+        """
+        Whether requests to the API are currently being rejected
+        by the circuit breaker
+        """
+        return self._breaker.state == BreakerState.OPEN
+
+    def download(
+        self,
+        url: str,
+        path: Union[Path, str],
+        meta_path: Union[Path, str],
+        timeout: int = 5,
+    ) -> None:
+        """
+        Download a file through the API session, streaming it to disk. The
+        validators of the last download are stored in a sidecar file and sent
+        with the request so an unchanged file is not downloaded again. The
+        existing file is not rewritten when the content is unchanged.
+
+        :param url: The url of the file
+        :param path: Location to save the file
+        :param meta_path: Location of the sidecar file
+        :param timeout: The request timeout in seconds
+        """
+        path, meta_path = Path(path), Path(meta_path)
+
+        meta = {}
+        if path.exists():
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                pass
+
+        headers = {}
+        if meta.get("url") == url:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        with self._session.get(
+            url, headers=headers, stream=True, timeout=timeout
+        ) as response:
+            if response.status_code == 304:
+                logger.debug("%s has not been modified", url)
+                return
+
+            response.raise_for_status()
+
+            part_path = path.with_name(f"{path.name}.part")
+            digest = hashlib.sha1()
+            with open(part_path, mode="wb") as file:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
+                    digest.update(chunk)
+
+            sha1 = digest.hexdigest()
+            if path.exists() and meta.get("sha1") == sha1:
+                os.remove(part_path)
+            else:
+                os.replace(part_path, path)
+
+            meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "sha1": sha1,
+            }
+
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+    def _prepare_body(
+        self,
+        json_request: Union[dict, None],
+        encoder: Union[type[json.JSONEncoder], None],
+        compress: bool,
+        stats: _BodyStats,
+    ) -> tuple[dict, dict[str, str]]:
+        """
+        Prepare the body of a request
+
+        :param json_request: The payload
+        :param encoder: Encoder used to stream the payload, if any
+        :param compress: Whether the body should be gzip compressed
+        :param stats: Stats to record the body size into
+        :return: The keyword arguments for the body and any additional headers
+        """
+
+        if encoder is None and not compress:
+            return {"json": json_request}, {}
+
+        headers = {"Content-Type": "application/json"}
+        chunks = _iter_chunks(_iter_json(json_request, encoder or json.JSONEncoder))
+
+        if compress:
+            head: list[bytes] = []
+            size = 0
+            for chunk in chunks:
+                head.append(chunk)
+                size += len(chunk)
+                if size >= COMPRESSION_THRESHOLD:
+                    break
+            else:
+                data = b"".join(head)
+                stats.raw = stats.sent = len(data)
+                return {"data": data}, headers
+
+            headers["Content-Encoding"] = "gzip"
+            data = _gzip_chunks(itertools.chain(head, chunks), stats)
+        else:
+            data = _count_chunks(chunks, stats)
+
+        if encoder is None:
+            data = b"".join(data)
+
+        return {"data": data}, headers
+
+    def _send(
+        self,
+        request_type: RequestAction,
+        url: str,
+        json_request: Union[dict, None],
+        headers: Union[dict, None],
+        timeout: int,
+        encoder: Union[type[json.JSONEncoder], None],
+        compress: bool,
+    ) -> requests.Response:
+        """
+        Make a single attempt at a request
+
+        :param request_type: The request type
+        :param url: URL endpoint for the request
+        :param json_request: The payload
+        :param headers: Additional headers for the request
+        :param timeout: The request timeout in seconds
+        :param encoder: Encoder used to stream the payload, if any
+        :param compress: Whether to attempt compressing the body
+        :return: The server response
+        """
+
+        compress = compress and url not in self._uncompressed_endpoints
+        stats = _BodyStats()
+        body, body_headers = self._prepare_body(json_request, encoder, compress, stats)
+        request_headers = (
+            {**(headers or {}), **body_headers} if body_headers else headers
+        )
+
+        req_send = time.time()
+        response = self._session.request(
+            request_type,
+            url,
+            headers=request_headers,
+            timeout=timeout,
+            **body,
+        )
+        logger.debug(
+            "%s response time: %s seconds",
+            self.__class__.__name__,
+            time.time() - req_send,
+        )
+        if stats.raw:
+            logger.debug(
+                "%s request body: %s bytes sent of %s",
+                self.__class__.__name__,
+                stats.sent,
+                stats.raw,
+            )
+
+        if "Content-Encoding" in body_headers and _rejects_compression(response):
+            logger.info(
+                "%s rejected a compressed body. Retrying uncompressed",
+                self.__class__.__name__,
+            )
+            self._uncompressed_endpoints.add(url)
+            return self._send(
+                request_type, url, json_request, headers, timeout, encoder, False
+            )
+
+        return response
+
     def _request(
         self,
         request_type: RequestAction,
@@ -52,36 +660,141 @@ class _APIManager:
         json_request: Union[dict, None],
         headers: Union[dict, None] = None,
         timeout: int = 5,
+        *,
+        encoder: Union[type[json.JSONEncoder], None] = None,
+        compress: bool = False,
+        retry: Union[RetryPolicy, None] = None,
+        alert: bool = True,
     ) -> requests.Response:
         """
-        Make a request to the class's API
+        Make a request to the class's API. Failed requests are retried
+        based on the retry policy for the request type.
 
         :param url: URL endpoint for the request
         :param json_request: JSON payload as a string
+        :param encoder: When provided, the payload is streamed to the server
+        as compact JSON using this encoder instead of being serialized up front
+        :param compress: Gzip the request body when it is larger than
+        `COMPRESSION_THRESHOLD`. Falls back to an uncompressed body if the
+        endpoint rejects it.
+        :param retry: Retry policy to use instead of the policy for the request type
+        :param alert: Alert the user if the connection fails
         :return: Data recieved from the request
         """
 
+        if retry is None:
+            retry = self._retry_policies.get(request_type, RetryPolicy())
+
+        if not self._breaker.allow_request():
+            raise CircuitOpenError(f"{type(self).__name__} is unavailable")
+
+        previous_state = self._breaker.state
+        start = time.monotonic()
         try:
-            req_send = time.time()
-            response = self._session.request(
+            response = self._request_with_retries(
                 request_type,
                 url,
-                headers=headers,
-                json=json_request,
-                timeout=timeout,
-            )
-            logger.debug(
-                "%s response time: %s seconds",
-                self.__class__.__name__,
-                time.time() - req_send,
+                json_request,
+                headers,
+                timeout,
+                encoder,
+                compress,
+                retry,
+                alert,
             )
-        except requests.exceptions.ConnectionError:
-            message = f"Connection with {type(self).__name__} failed"
-            self._rhapi.ui.message_alert(message)
-            logger.warning(message)
-            self._connected = False
+        except requests.exceptions.RequestException:
+            self._breaker.record_failure()
+            self.limiter.observe(time.monotonic() - start, False)
             raise
-
-        self._connected = True
+        except Exception:
+            self._breaker.release()
+            raise
+        else:
+            success = response.status_code < 500
+            if success:
+                self._breaker.record_success()
+            else:
+                self._breaker.record_failure()
+            self.limiter.observe(time.monotonic() - start, success)
+        finally:
+            if (state := self._breaker.state) != previous_state:
+                logger.info(
+                    "%s circuit breaker is now %s", type(self).__name__, state.value
+                )
 
         return response
+
+    def _request_with_retries(
+        self,
+        request_type: RequestAction,
+        url: str,
+        json_request: Union[dict, None],
+        headers: Union[dict, None],
+        timeout: int,
+        encoder: Union[type[json.JSONEncoder], None],
+        compress: bool,
+        retry: RetryPolicy,
+        alert: bool = True,
+    ) -> requests.Response:
+        """
+        Make a request, retrying failed attempts based on the retry policy
+
+        :param request_type: The request type
+        :param url: URL endpoint for the request
+        :param json_request: The payload
+        :param headers: Additional headers for the request
+        :param timeout: The request timeout in seconds
+        :param encoder: Encoder used to stream the payload, if any
+        :param compress: Whether to attempt compressing the body
+        :param retry: The retry policy to use
+        :param alert: Alert the user if the connection fails
+        :return: The server response
+        """
+        # pylint: disable=R0913
+
+        attempt = 0
+        while True:
+            try:
+                response = self._send(
+                    request_type, url, json_request, headers, timeout, encoder, compress
+                )
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as exc:
+                if attempt < retry.retries and (
+                    retry.idempotent
+                    or isinstance(exc, requests.exceptions.ConnectionError)
+                ):
+                    logger.debug(
+                        "%s request failed (%s). Retrying",
+                        self.__class__.__name__,
+                        type(exc).__name__,
+                    )
+                    gevent.sleep(retry.delay(attempt))
+                    attempt += 1
+                    continue
+
+                message = f"Connection with {type(self).__name__} failed"
+                if alert:
+                    self._rhapi.ui.message_alert(message)
+                logger.warning(message)
+                self._connected = False
+                raise
+
+            if (
+                (response.status_code in RETRY_STATUS or response.status_code >= 500)
+                and retry.idempotent
+                and attempt < retry.retries
+            ):
+                logger.debug(
+                    "%s responded with %s. Retrying",
+                    self.__class__.__name__,
+                    response.status_code,
+                )
+                gevent.sleep(retry.delay(attempt))
+                attempt += 1
+                continue
+
+            self._connected = True
+            return response
@@ -25,6 +25,19 @@ class RequestAction(str, Enum):
     """Represents a DELETE action"""
 
 
+class BreakerState(str, Enum):
+    """
+    Circuit breaker states
+    """
+
+    CLOSED = "closed"
+    """Requests are sent normally"""
+    OPEN = "open"
+    """Requests are rejected without contacting the server"""
+    HALF_OPEN = "half_open"
+    """A limited number of probe requests are allowed through"""
+
+
 class MGPMode(str, Enum):
     """
     MultiGP Schedule types
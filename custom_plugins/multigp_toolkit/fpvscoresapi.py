@@ -2,6 +2,7 @@
 FPVScores Connections
 """
 
+import hashlib
 import json
 import logging
 import sys
@@ -20,6 +21,7 @@ else:
     from typing_extensions import Concatenate, ParamSpec
 
 import gevent
+import gevent.queue
 import requests
 from data_export import DataExporter
 from Database import (
@@ -37,7 +39,7 @@ from sqlalchemy import inspect
 from sqlalchemy.ext.declarative import DeclarativeMeta
 from typing_extensions import override
 
-from .abstracts import _APIManager
+from .abstracts import RetryPolicy, _APIManager
 from .enums import RequestAction
 
 logger = logging.getLogger(__name__)
@@ -53,6 +55,13 @@ LEGACY_HEADERS = {
     "Content-Type": "application/json",
 }
 """Headers for FPVScores MultiGP requests"""
+OUTBOX_SIZE = 256
+"""Maximum number of listener jobs waiting in the outbox"""
+OUTBOX_WORKERS = 1
+"""Number of greenlets draining the outbox. Jobs are only guaranteed
+to be processed in order when a single worker is used"""
+HEAT_UPDATE_DEBOUNCE = 2.0
+"""Seconds to wait for additional heat changes before sending an update"""
 
 P = ParamSpec("P")
 """Generic for typing"""
@@ -80,6 +89,12 @@ class FPVScoresAPI(_APIManager):
 
     _linked_org: Union[bool, None] = None
     """Whether the current MultiGP chapter is linked to FPVScores or not"""
+    _retry_policies = {
+        **_APIManager._retry_policies,
+        RequestAction.POST: RetryPolicy(),
+    }
+    """Retry policy for each request type. FPVScores POST requests
+    replace the stored data, so they are safe to retry."""
     sync_ran: bool = False
     """Status if a full sync was ran or not"""
 
@@ -94,9 +109,52 @@ class FPVScoresAPI(_APIManager):
         self._rhapi = rhapi
         """A stored instance of RHAPI"""
         self.sync_guard = BoundedSemaphore()
+        self._outbox: gevent.queue.Queue = gevent.queue.Queue(OUTBOX_SIZE)
+        """Queue of pending listener jobs"""
+        self._outbox_workers: list[gevent.Greenlet] = []
+        """Greenlets processing the outbox"""
+        self._pending_heats: dict[int, None] = {}
+        """Ids of heats waiting to be sent, in the order first changed"""
+        self._heat_flush: Union[gevent.Greenlet, None] = None
+        """Scheduled flush of the pending heat updates"""
+        self._leaderboard_rows: dict[int, dict[tuple[str, str, int], str]] = {}
+        """Digest of each pilot row last accepted by FPVScores for each class"""
 
         if standard_plugin_not_installed():
             self._register_listeners()
+            self._start_outbox()
+
+    def _start_outbox(self) -> None:
+        """
+        Spawns the greenlets used to process the listener outbox
+        """
+        for _ in range(OUTBOX_WORKERS):
+            self._outbox_workers.append(gevent.spawn(self._outbox_worker))
+
+    def _outbox_worker(self) -> None:
+        """
+        Processes queued listener jobs. Network requests, response parsing,
+        and user notifications for the listeners all happen here so the
+        triggering event never waits on FPVScores.
+        """
+        while True:
+            job: Callable[[], None] = self._outbox.get()
+            try:
+                job()
+            except Exception:  # pylint: disable=W0718
+                logger.exception("FPVScores: Listener job failed")
+
+    def _submit(self, job: Callable[[], None]) -> None:
+        """
+        Adds a job to the listener outbox without blocking. The job is
+        dropped if the outbox is full.
+
+        :param job: The job to run on an outbox worker
+        """
+        try:
+            self._outbox.put_nowait(job)
+        except gevent.queue.Full:
+            logger.warning("FPVScores: Outbox full. Dropping listener update")
 
     def _register_listeners(self) -> None:
         """
@@ -140,24 +198,22 @@ class FPVScoresAPI(_APIManager):
 
     def connection_check(self) -> bool:
         """
-        Checks for a connection to FPVScores
+        Checks for a connection to FPVScores. While the circuit breaker is
+        open, the check fails without contacting FPVScores. User settings are
+        left in place so syncing resumes once FPVScores is reachable.
 
         :return: The connection status
         """
 
-        if self._connected is None:
+        if not self._connected:
             try:
                 self._request(RequestAction.GET, BASE_API_URL, None)
-            except requests.ConnectionError:
+            except requests.exceptions.RequestException:
                 self._connected = False
             else:
                 self._connected = True
 
-        if self._connected is False:
-            self._rhapi.db.option_set("push_fpvs", "0")
-            self._rhapi.db.option_set("fpvscores_autoupload_mgp", "0")
-
-        return self._connected
+        return bool(self._connected)
 
     def generate_fpvsconditions(self) -> Generator[bool, None, None]:
         """
@@ -202,16 +258,20 @@ class FPVScoresAPI(_APIManager):
 
         @wraps(func)
         def inner(self, *args: P.args, **kwargs: P.kwargs):
-            if all(self._generate_listener_conditions()):
-                func(self, *args, **kwargs)
+            def job():
+                if all(self._generate_listener_conditions()):
+                    func(self, *args, **kwargs)
+
+            self._submit(job)
 
         return inner
 
-    def _parse_server_response(self, data: str) -> None:
+    def _parse_server_response(self, data: str) -> bool:
         """
         Attempts to parse the incoming data from the FPVScores server.
 
         :param data: The returned FPVScores data
+        :return: Whether the server reported the request as accepted
         """
 
         try:
@@ -220,11 +280,15 @@ class FPVScoresAPI(_APIManager):
             message = "FPVScores: Failed to parse server response."
             logger.error("%s Response: %s", message, data)
             self._rhapi.ui.message_notify(message)
-            return
+            return False
 
         if isinstance(parsed_data, list):
-            parsed_data = parsed_data[0]
+            parsed_data = parsed_data[0] if parsed_data else {}
 
+        if not isinstance(parsed_data, dict):
+            parsed_data = {}
+
+        accepted = False
         if "status" in parsed_data and "message" in parsed_data:
             message = f"FPVScores: {parsed_data['message']}"
 
@@ -233,6 +297,7 @@ class FPVScoresAPI(_APIManager):
                 self._rhapi.ui.message_notify(message)
             else:
                 self._rhapi.ui.message_notify(message)
+                accepted = True
 
         else:
             message = "FPVScores: Unexpected response format."
@@ -241,6 +306,8 @@ class FPVScoresAPI(_APIManager):
         if "event_uuid" in parsed_data:
             self._rhapi.db.option_set("event_uuid_toolkit", parsed_data["event_uuid"])
 
+        return accepted
+
     def _process_response(self, greenlet: gevent.Greenlet) -> None:
         """
         Wait for the response greenlet to finish. Attempt to
@@ -250,20 +317,43 @@ class FPVScoresAPI(_APIManager):
         """
 
         gevent.wait((greenlet,))
-        response: requests.Response = greenlet.value
+        response: Union[requests.Response, None] = greenlet.value
+
+        if response is None:
+            message = "FPVScores: Request failed."
+            self._rhapi.ui.message_notify(message)
+            return
+
         self._parse_server_response(response.text)
 
-    def _class_listener_request(self, payload: dict) -> None:
+    def _listener_request(self, action: str, payload: dict) -> bool:
         """
-        Submits a request to the class update enpoint asynchronously
-        using gevent
+        Sends a listener payload to FPVScores and parses the response.
+        Expected to be ran from an outbox worker.
 
+        :param action: The FPVScores endpoint action
         :param payload: The payload to send
+        :return: Whether the server accepted the request
         """
 
-        url = f"{BASE_API_URL}/rh/{FPVS_API_VERSION}/?action=class_update"
-        greenlet = gevent.spawn(self._request, RequestAction.POST, url, payload)
-        self._process_response(greenlet)
+        url = f"{BASE_API_URL}/rh/{FPVS_API_VERSION}/?action={action}"
+
+        try:
+            response = self._request(RequestAction.POST, url, payload)
+        except requests.exceptions.RequestException:
+            logger.warning("FPVScores: %s request failed", action)
+            return False
+
+        accepted = self._parse_server_response(response.text)
+        return response.status_code == 200 and accepted
+
+    def _class_listener_request(self, payload: dict) -> None:
+        """
+        Submits a request to the class update enpoint
+
+        :param payload: The payload to send
+        """
+        self._listener_request("class_update", payload)
 
     @_check_listener_conditions
     def add_raceclass_listener(self, args: Union[dict, None]) -> None:
@@ -293,6 +383,8 @@ class FPVScoresAPI(_APIManager):
         """
         class_id = args["class_id"]
         raceclass: RaceClass = self._rhapi.db.raceclass_by_id(class_id)
+        if raceclass is None:
+            return
 
         payload = {
             "event_uuid": self._rhapi.db.option("event_uuid_toolkit"),
@@ -330,24 +422,25 @@ class FPVScoresAPI(_APIManager):
         :param args: Default callback arguments
         """
 
+        self._leaderboard_rows.pop(args["class_id"], None)
+
         payload = {
             "event_uuid": self._rhapi.db.option("event_uuid_toolkit"),
             "class_id": args["class_id"],
         }
 
-        url = f"{BASE_API_URL}/rh/{FPVS_API_VERSION}/?action=class_delete"
-        greenlet = gevent.spawn(self._request, RequestAction.POST, url, payload)
-        self._process_response(greenlet)
+        self._listener_request("class_delete", payload)
 
-    @_check_listener_conditions
-    def heat_listener(self, args: Union[dict, None]) -> None:
+    def _generate_heat_data(
+        self, heat: Heat, race_channels: list[str]
+    ) -> dict[str, Union[str, list]]:
         """
-        Sync the individual heat data to FPVScores
+        Generate the FPVScores data for a single heat
 
-        :param args: Default callback arguments
+        :param heat: The heat to generate the data for
+        :param race_channels: The channel list in the FPVScores format
+        :return: The formated heat data
         """
-
-        heat: Heat = self._rhapi.db.heat_by_id(args["heat_id"])
         heat_data: dict[str, Union[str, list]] = {
             "class_id": f"{heat.class_id}",
             "class_name": "unsupported",
@@ -358,8 +451,6 @@ class FPVScoresAPI(_APIManager):
             "slots": [],
         }
 
-        race_channels = self.get_race_channels()
-
         slots: list[HeatNode] = self._rhapi.db.slots_by_heat(heat.id)
         for slot in slots:
             if slot.node_index is None:
@@ -380,14 +471,47 @@ class FPVScoresAPI(_APIManager):
             if slot_["channel"] != "0" and slot_["channel"] != "00":
                 heat_data["slots"].append(slot_)
 
+        return heat_data
+
+    def _flush_heat_updates(self) -> None:
+        """
+        Sends all pending heat updates to FPVScores as a single request
+        """
+        heat_ids = list(self._pending_heats)
+        self._pending_heats.clear()
+
+        race_channels = self.get_race_channels()
+        heats = []
+        for heat_id in heat_ids:
+            heat: Heat = self._rhapi.db.heat_by_id(heat_id)
+            if heat is not None:
+                heats.append(self._generate_heat_data(heat, race_channels))
+
+        if not heats:
+            return
+
         payload = {
             "event_uuid": self._rhapi.db.option("event_uuid_toolkit"),
-            "heats": [heat_data],
+            "heats": heats,
         }
 
-        url = f"{BASE_API_URL}/rh/{FPVS_API_VERSION}/?action=heat_update"
-        greenlet = gevent.spawn(self._request, RequestAction.POST, url, payload)
-        self._process_response(greenlet)
+        self._listener_request("heat_update", payload)
+
+    @_check_listener_conditions
+    def heat_listener(self, args: Union[dict, None]) -> None:
+        """
+        Sync the individual heat data to FPVScores. Updates are held for
+        `HEAT_UPDATE_DEBOUNCE` seconds and merged into a single request.
+
+        :param args: Default callback arguments
+        """
+
+        self._pending_heats[args["heat_id"]] = None
+
+        if self._heat_flush is None or self._heat_flush.dead:
+            self._heat_flush = gevent.spawn_later(
+                HEAT_UPDATE_DEBOUNCE, self._submit, self._flush_heat_updates
+            )
 
     @_check_listener_conditions
     def heat_delete(self, args: Union[dict, None]):
@@ -397,14 +521,14 @@ class FPVScoresAPI(_APIManager):
         :param args: Default callback arguments
         """
 
+        self._pending_heats.pop(args["heat_id"], None)
+
         payload = {
             "event_uuid": self._rhapi.db.option("event_uuid_toolkit"),
             "heat_id": args["heat_id"],
         }
 
-        url = f"{BASE_API_URL}/rh/{FPVS_API_VERSION}/?action=heat_delete"
-        greenlet = gevent.spawn(self._request, RequestAction.POST, url, payload)
-        self._process_response(greenlet)
+        self._listener_request("heat_delete", payload)
 
     @_check_listener_conditions
     def pilot_listener(self, args: Union[dict, None]) -> None:
@@ -415,6 +539,9 @@ class FPVScoresAPI(_APIManager):
         """
 
         pilot: Pilot = self._rhapi.db.pilot_by_id(args["pilot_id"])
+        if pilot is None:
+            return
+
         payload = {
             "event_uuid": self._rhapi.db.option("event_uuid_toolkit"),
             "pilot_id": pilot.id,
@@ -431,9 +558,7 @@ class FPVScoresAPI(_APIManager):
             ),
         }
 
-        url = f"{BASE_API_URL}/rh/{FPVS_API_VERSION}/?action=pilot_update"
-        greenlet = gevent.spawn(self._request, RequestAction.POST, url, payload)
-        self._process_response(greenlet)
+        self._listener_request("pilot_update", payload)
 
     def generate_rank_payload(self, raceclass: RaceClass) -> list[dict]:
         """
@@ -564,18 +689,50 @@ class FPVScoresAPI(_APIManager):
         """
 
         race_meta: SavedRaceMeta = self._rhapi.db.race_by_id(args["race_id"])
+        if race_meta is None:
+            return
+
         race_class: RaceClass = self._rhapi.db.raceclass_by_id(race_meta.class_id)
 
+        ranking = self.generate_rank_payload(race_class)
+        results = self.generate_results_payload(race_class)
+
+        rows: dict[tuple[str, str, int], str] = {}
+        changed: dict[str, list[dict]] = {"ranking": [], "results": []}
+        previous = self._leaderboard_rows.get(race_meta.class_id)
+
+        for section, section_rows in (("ranking", ranking), ("results", results)):
+            for data in section_rows:
+                encoded = json.dumps(data, sort_keys=True, default=str).encode()
+                key = (section, data["method_label"], data["pilot_id"])
+                rows[key] = hashlib.sha1(encoded).hexdigest()
+
+                if previous is None or previous.get(key) != rows[key]:
+                    changed[section].append(data)
+
+        if previous == rows:
+            logger.debug(
+                "FPVScores: Leaderboard for class %s unchanged", race_meta.class_id
+            )
+            return
+
+        # Rows removed from the leaderboard can only be cleared by a full upload
+        if (
+            previous is not None
+            and previous.keys() <= rows.keys()
+            and self._rhapi.db.option("fpvs_partial_leaderboard") == "1"
+        ):
+            ranking, results = changed["ranking"], changed["results"]
+
         payload = {
             "event_uuid": self._rhapi.db.option("event_uuid_toolkit"),
-            "ranking": self.generate_rank_payload(race_class),
-            "results": self.generate_results_payload(race_class),
+            "ranking": ranking,
+            "results": results,
             "classid": race_meta.class_id,
         }
 
-        url = f"{BASE_API_URL}/rh/{FPVS_API_VERSION}/?action=leaderboard_update"
-        greenlet = gevent.spawn(self._request, RequestAction.POST, url, payload)
-        self._process_response(greenlet)
+        if self._listener_request("leaderboard_update", payload):
+            self._leaderboard_rows[race_meta.class_id] = rows
 
     def run_full_sync(self, _args: Union[dict, None] = None) -> None:
         """
@@ -589,15 +746,24 @@ class FPVScoresAPI(_APIManager):
             self._rhapi.ui.message_notify(message)
             return
 
+        self._leaderboard_rows.clear()
+
         message = "Running a full push to FPVScores. This may take a minute or two..."
         self._rhapi.ui.message_notify(self._rhapi.language.__(message))
 
-        export = self._rhapi.io.run_export("JSON_FPVScores_MGP_Upload")
-        payload = json.loads(export["data"])
+        payload = _assemble_fpvscores_upload(self._rhapi)
         url = f"{BASE_API_URL}/rh/{FPVS_API_VERSION}/?action=full_manual_import"
 
         greenlet = gevent.spawn(
-            self._request, RequestAction.POST, url, payload, LEGACY_HEADERS, 600
+            self._request,
+            RequestAction.POST,
+            url,
+            payload,
+            LEGACY_HEADERS,
+            600,
+            encoder=AlchemyEncoder,
+            compress=self._rhapi.db.option("fpvs_compress") == "1",
+            retry=RetryPolicy(retries=1, idempotent=False),
         )
         self._process_response(greenlet)
 
@@ -621,7 +787,10 @@ class FPVScoresAPI(_APIManager):
         )
         gevent.wait((greenlet,))
 
-        response: requests.Response = greenlet.value
+        response: Union[requests.Response, None] = greenlet.value
+
+        if response is None:
+            return None
 
         if response.status_code == 200 and response.text != "no event found":
             logger.info("FPVScores event URL: %s", response.text)
@@ -629,16 +798,17 @@ class FPVScoresAPI(_APIManager):
 
         return None
 
-    def check_linked_org(self) -> bool:
+    def check_linked_org(self) -> Union[bool, None]:
         """
         Checks if the MultiGP API timer key in the system is linked to
         an FPVScores organization
 
-        :return: Whether the key is linked or not
+        :return: Whether the key is linked or not. None if FPVScores
+        could not be reached.
         """
 
         if not self._connected:
-            return False
+            return None
 
         payload = {"mgp_api_key": self._rhapi.db.option("mgp_api_key")}
         url = f"{BASE_API_URL}/rh/{FPVS_API_VERSION}/?action=mgp_api_check"
@@ -648,7 +818,10 @@ class FPVScoresAPI(_APIManager):
         )
         gevent.wait((greenlet,))
 
-        response: requests.Response = greenlet.value
+        response: Union[requests.Response, None] = greenlet.value
+
+        if response is None:
+            return None
 
         if response.status_code == 200:
             data = json.loads(response.text.split("\n")[-1])
@@ -709,6 +882,25 @@ def _assemble_heatnodes_complete(rhapi: RHAPI) -> dict:
     return payload
 
 
+def _assemble_fpvscores_upload(rhapi: RHAPI) -> dict:
+    """
+    Assembles the full event payload for FPVScores
+
+    :param rhapi: An instance of RHAPI
+    :return: The event payload
+    """
+    payload = {}
+    payload["import_settings"] = "upload_FPVScores"
+    payload["Pilot"] = _assemble_pilots_complete(rhapi)
+    payload["Heat"] = rhapi.db.heats
+    payload["HeatNode"] = _assemble_heatnodes_complete(rhapi)
+    payload["RaceClass"] = rhapi.db.raceclasses
+    payload["GlobalSettings"] = rhapi.db.options
+    payload["FPVScores_results"] = rhapi.eventresults.results
+
+    return payload
+
+
 def register_handlers(args: Union[dict, None]) -> None:
     """
     Register export handlers
@@ -717,65 +909,97 @@ def register_handlers(args: Union[dict, None]) -> None:
     """
 
     def write_to_json(data):
-        payload = json.dumps(data, indent="\t", cls=AlchemyEncoder)
+        payload = json.dumps(data, separators=(",", ":"), cls=AlchemyEncoder)
         return {"data": payload, "encoding": "application/json", "ext": "json"}
 
-    def assemble_fpvscores_upload(rhapi: RHAPI):
-        payload = {}
-        payload["import_settings"] = "upload_FPVScores"
-        payload["Pilot"] = _assemble_pilots_complete(rhapi)
-        payload["Heat"] = rhapi.db.heats
-        payload["HeatNode"] = _assemble_heatnodes_complete(rhapi)
-        payload["RaceClass"] = rhapi.db.raceclasses
-        payload["GlobalSettings"] = rhapi.db.options
-        payload["FPVScores_results"] = rhapi.eventresults.results
-
-        return payload
-
     if "register_fn" in args:
         args["register_fn"](
             DataExporter(
                 "JSON FPVScores MGP Upload",
                 write_to_json,
-                assemble_fpvscores_upload,
+                _assemble_fpvscores_upload,
             )
         )
 
 
+_MISSING = object()
+"""Sentinel for attributes not set on an object"""
+
+
 class AlchemyEncoder(json.JSONEncoder):
     """
     JSON encoder for SQLAlchemy objects
     """
 
+    custom_vars = (
+        "node_frequency_band",
+        "node_frequency_c",
+        "node_frequency_f",
+        "mgpid",
+        "display_name",
+    )
+    """Additional attributes to encode when present on an object"""
+    json_fields = ("frequencies", "enter_ats", "exit_ats")
+    """Attributes stored as JSON strings in the database"""
+
+    _mapped_fields: dict[type, tuple[tuple[str, ...], tuple[str, ...]]] = {}
+    """Cache of the column and relationship keys for each mapped class"""
+
+    @classmethod
+    def _fields_for(cls, mapped_class: type) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        """
+        Get the attribute keys for a mapped class. Computed once per class.
+
+        :param mapped_class: The mapped class
+        :return: The column keys and relationship keys of the class
+        """
+        if (fields := cls._mapped_fields.get(mapped_class)) is None:
+            mapper = inspect(mapped_class)
+            relationships = tuple(mapper.relationships.keys())
+            columns = tuple(
+                key
+                for key in mapper.attrs.keys()
+                if key not in relationships and key not in cls.custom_vars
+            )
+            fields = cls._mapped_fields[mapped_class] = (columns, relationships)
+
+        return fields
+
+    def _encode_field(self, field: str, data: object) -> object:
+        """
+        Convert an attribute value into a JSON compatible value
+
+        :param field: The attribute name
+        :param data: The attribute value
+        :return: The converted value, or None if the value can not be encoded
+        """
+        if data is None or isinstance(data, (str, int, float)):
+            if field in self.json_fields and isinstance(data, str):
+                return json.loads(data)
+            return data
+
+        try:
+            json.dumps(data)
+        except TypeError:
+            return None
+
+        return data
+
     @override
     def default(self, o: object):
-        custom_vars = (
-            "node_frequency_band",
-            "node_frequency_c",
-            "node_frequency_f",
-            "mgpid",
-            "display_name",
-        )
-
         if isinstance(o.__class__, DeclarativeMeta):
-            mapped_instance = inspect(o)
+            columns, relationships = self._fields_for(o.__class__)
             fields = {}
 
-            for field in dir(o):
-                if field in [*mapped_instance.attrs.keys(), *custom_vars]:
-                    data = o.__getattribute__(field)
-
-                    if field != "query" and field != "query_class":
-                        try:
-                            json.dumps(data)
-                            if field == "frequencies":
-                                fields[field] = json.loads(data)
-                            elif field == "enter_ats" or field == "exit_ats":
-                                fields[field] = json.loads(data)
-                            else:
-                                fields[field] = data
-                        except TypeError:
-                            fields[field] = None
+            for field in columns:
+                fields[field] = self._encode_field(field, getattr(o, field))
+
+            for field in relationships:
+                fields[field] = None
+
+            for field in self.custom_vars:
+                if (data := getattr(o, field, _MISSING)) is not _MISSING:
+                    fields[field] = self._encode_field(field, data)
 
             return fields
 
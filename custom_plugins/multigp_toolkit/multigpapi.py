@@ -3,12 +3,14 @@ MultiGP RaceSync API Access
 """
 
 import logging
-from typing import TypeVar, Union
+from pathlib import Path
+from typing import Any, TypeVar, Union
 
 import requests
 
-from .abstracts import _APIManager
+from .abstracts import RetryPolicy, _APIManager
 from .enums import RequestAction
+from .persistence import ResponseCache
 
 logger = logging.getLogger(__name__)
 """Module logger"""
@@ -21,6 +23,10 @@ U = TypeVar("U", bound=Union[bool, str, int, dict])
 BASE_API_URL = "https://www.multigp.com/mgp/multigpwebservice"
 """MultiGP API base URL"""
 
+RESPONSE_CACHE_TTL = {"race/listForChapter": 300.0, "race/view": 120.0}
+"""Number of seconds a successful response is cached for each read-only
+RaceSync endpoint"""
+
 
 class MultiGPAPI(_APIManager):
     """
@@ -36,17 +42,71 @@ class MultiGPAPI(_APIManager):
     _chapter_id: Union[int, None] = None
     """MultiGP id for the chapter"""
 
-    def __init__(self, rhapi):
+    _retry_policies = {
+        **_APIManager._retry_policies,
+        RequestAction.POST: RetryPolicy(),
+    }
+    """Retry policy for each request type. RaceSync uses POST for
+    read-only requests, so they are safe to retry."""
+
+    def __init__(self, rhapi, cache_path: Union[Path, str, None] = None):
         """
         Class initalization
 
         :param rhapi: An instance of RHAPI
+        :param cache_path: Location of the database file used to persist
+        cached responses. Responses are only cached in memory when not provided.
         """
         headers = {"Content-type": "application/json"}
         super().__init__(rhapi, headers)
 
+        self._cache = ResponseCache(cache_path)
+        """Cache of read-only RaceSync responses"""
+
+    def _cached_request(self, endpoint: str, query: str) -> dict[str, Any]:
+        """
+        Request data from a read-only RaceSync endpoint. A cached response is
+        used if one is still valid, and successful responses are cached for
+        the endpoint's time to live.
+
+        :param endpoint: The endpoint path under the base url
+        :param query: The query string of the request
+        :return: The parsed data
+        """
+        url = f"{BASE_API_URL}/{endpoint}?{query}"
+
+        if (cached := self._cache.get(url)) is not None:
+            return cached
+
+        payload = {"apiKey": self._api_key}
+        returned_json = self._request_and_parse(RequestAction.POST, url, payload)
+
+        if returned_json["status"]:
+            self._cache.put(url, returned_json, RESPONSE_CACHE_TTL[endpoint])
+
+        return returned_json
+
+    def clear_cache(self) -> None:
+        """
+        Discard all cached RaceSync responses
+        """
+        self._cache.clear()
+
+    def forget_race(self, race_id: Union[str, int]) -> None:
+        """
+        Discard the cached data for a race
+
+        :param race_id: The MultiGP id for the race
+        """
+        self._cache.forget(f"{BASE_API_URL}/race/view?id={race_id}")
+
     def _request_and_parse(
-        self, request_type: RequestAction, url: str, json_request: dict
+        self,
+        request_type: RequestAction,
+        url: str,
+        json_request: dict,
+        *,
+        raise_errors: bool = False,
     ) -> Union[dict[str, bool], dict[str, U]]:
         """
         Request data from the MultiGP API and parse it's output
@@ -54,15 +114,18 @@ class MultiGPAPI(_APIManager):
         :param request_type: The request type
         :param url: The url to send the request
         :param json_request: The payload
+        :param raise_errors: Raise connection errors for the caller to report
+        instead of alerting the user and returning a failed status
         :return: The parsed data
         """
 
-        if self._connected is False:
-            return {"status": False}
-
         try:
-            response = self._request(request_type, url, json_request)
-        except requests.exceptions.ConnectionError:
+            response = self._request(
+                request_type, url, json_request, alert=not raise_errors
+            )
+        except requests.exceptions.RequestException:
+            if raise_errors:
+                raise
             return {"status": False}
 
         try:
@@ -79,16 +142,20 @@ class MultiGPAPI(_APIManager):
         """
         self._api_key = api_key
 
-    def pull_chapter(self) -> Union[str, None]:
+    def pull_chapter(self, raise_errors: bool = False) -> Union[str, None]:
         """
         Find the chapter for the set RaceSync API key.
 
+        :param raise_errors: Raise connection errors for the caller to report
+        instead of alerting the user and returning None
         :return: The name of the Chapter, returns None if chapter not found
         """
         url = f"{BASE_API_URL}/chapter/findChapterFromApiKey"
         payload = {"apiKey": self._api_key}
 
-        returned_json = self._request_and_parse(RequestAction.POST, url, payload)
+        returned_json = self._request_and_parse(
+            RequestAction.POST, url, payload, raise_errors=raise_errors
+        )
 
         if returned_json["status"]:
             self._chapter_id = returned_json["chapterId"]
@@ -105,10 +172,9 @@ class MultiGPAPI(_APIManager):
         None if race not found.
         """
 
-        url = f"{BASE_API_URL}/race/listForChapter?chapterId={self._chapter_id}"
-        payload = {"apiKey": self._api_key}
-
-        returned_json = self._request_and_parse(RequestAction.POST, url, payload)
+        returned_json = self._cached_request(
+            "race/listForChapter", f"chapterId={self._chapter_id}"
+        )
 
         if returned_json["status"]:
             races = {}
@@ -128,10 +194,7 @@ class MultiGPAPI(_APIManager):
         :return: _description_
         """
 
-        url = f"{BASE_API_URL}/race/view?id={race_id}"
-        payload = {"apiKey": self._api_key}
-
-        returned_json = self._request_and_parse(RequestAction.POST, url, payload)
+        returned_json = self._cached_request("race/view", f"id={race_id}")
 
         if returned_json["status"]:
             logger.info("Pulled data for %s", {returned_json["data"]["chapterName"]})
@@ -159,13 +222,15 @@ class MultiGPAPI(_APIManager):
 
         return None
 
-    def push_slot_and_score(self, captured_data: tuple[str, int, int, int, dict]):
+    def slot_request(
+        self, captured_data: tuple[str, int, int, int, dict]
+    ) -> tuple[RequestAction, str, dict]:
         """
-        Push individual results to the RaceSync API
+        Build the request for pushing individual results to the RaceSync API
 
         :param captured_data: Data to send to RaceSync. Elements of the tuple include
         (race_id, round_number, heat_number, slot_number, race_data).
-        :return: The status of the results push
+        :return: The request type, url, and payload
         """
 
         race_id, race_round, heat, slot, race_data = captured_data
@@ -176,19 +241,31 @@ class MultiGPAPI(_APIManager):
         )
         payload = {"data": race_data, "apiKey": self._api_key}
 
-        returned_json = self._request_and_parse(RequestAction.PUT, url, payload)
+        return RequestAction.PUT, url, payload
+
+    def push_slot_and_score(self, captured_data: tuple[str, int, int, int, dict]):
+        """
+        Push individual results to the RaceSync API
+
+        :param captured_data: Data to send to RaceSync. Elements of the tuple include
+        (race_id, round_number, heat_number, slot_number, race_data).
+        :return: The status of the results push
+        """
+
+        returned_json = self._request_and_parse(*self.slot_request(captured_data))
+        self.forget_race(captured_data[0])
 
         return returned_json["status"]
 
-    def push_overall_race_results(
+    def overall_race_results_request(
         self, race_id: str, bracket_results: list[dict[str, int]]
-    ):
+    ) -> tuple[RequestAction, str, dict]:
         """
-        Push the overall results to the RaceSync API
+        Build the request for pushing the overall results to the RaceSync API
 
         :param race_id: The race id
         :param bracket_results: A list of pilot rankings
-        :return: The status of the reuslts push
+        :return: The request type, url, and payload
         """
 
         url = f"{BASE_API_URL}/race/captureOverallRaceResult?id={race_id}"
@@ -197,6 +274,22 @@ class MultiGPAPI(_APIManager):
             "apiKey": self._api_key,
         }
 
-        returned_json = self._request_and_parse(RequestAction.PUT, url, payload)
+        return RequestAction.PUT, url, payload
+
+    def push_overall_race_results(
+        self, race_id: str, bracket_results: list[dict[str, int]]
+    ):
+        """
+        Push the overall results to the RaceSync API
+
+        :param race_id: The race id
+        :param bracket_results: A list of pilot rankings
+        :return: The status of the reuslts push
+        """
+
+        returned_json = self._request_and_parse(
+            *self.overall_race_results_request(race_id, bracket_results)
+        )
+        self.forget_race(race_id)
 
         return returned_json["status"]
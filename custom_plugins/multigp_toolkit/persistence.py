@@ -0,0 +1,551 @@
+"""
+Local Storage for Pushed Data
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections.abc import Generator, Iterable
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Union
+
+from gevent.lock import RLock
+from RHAPI import RHAPI
+
+from .enums import RequestAction
+
+logger = logging.getLogger(__name__)
+"""Module logger"""
+
+DATABASE_NAME = "multigp_toolkit.db"
+"""File name of the toolkit database"""
+
+SlotKey = tuple[str, int, int, int]
+"""Key for a RaceSync slot. (race_id, round_number, heat_number, slot_number)"""
+SlotData = tuple[str, int, int, int, dict[str, Any]]
+"""Data for a RaceSync slot push. (race_id, round_number, heat_number,
+slot_number, race_data)"""
+
+
+def data_path(rhapi: RHAPI, file_name: str) -> Path:
+    """
+    Get the location to store a toolkit data file. Uses the RotorHazard
+    data directory when avaliable.
+
+    :param rhapi: An instance of RHAPI
+    :param file_name: The name of the file
+    :return: The path of the file
+    """
+    rhapi_version = (rhapi.API_VERSION_MAJOR, rhapi.API_VERSION_MINOR)
+    if rhapi_version >= (1, 3):
+        save_dir = Path(rhapi.server.data_dir).joinpath("multigp_toolkit")
+    else:
+        save_dir = Path("multigp_toolkit")
+
+    os.makedirs(save_dir, exist_ok=True)
+    return save_dir.joinpath(file_name)
+
+
+class _Database:
+    """
+    SQLite connection shared by every store using the same database file.
+    Uses write-ahead logging so commits do not wait on a full disk sync.
+    """
+
+    _open: dict[str, "_Database"] = {}
+    """Open databases by resolved file path"""
+
+    def __init__(self, path: Union[Path, str]):
+        """
+        Class initalization
+
+        :param path: Location of the database file
+        """
+        self.lock = RLock()
+        """Lock for database access"""
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        """Connection to the database"""
+
+        with self.lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+
+    @classmethod
+    def open(cls, path: Union[Path, str]) -> "_Database":
+        """
+        Get the shared connection for a database file, opening it if needed
+
+        :param path: Location of the database file
+        :return: The shared database
+        """
+        key = str(Path(path).resolve())
+        if (database := cls._open.get(key)) is None:
+            database = cls._open[key] = cls(path)
+
+        return database
+
+    def execute(self, sql: str, parameters: Iterable = ()) -> sqlite3.Cursor:
+        """
+        Run a single statement in its own transaction
+
+        :param sql: The statement
+        :param parameters: The statement parameters
+        :return: The cursor of the statement
+        """
+        with self.lock:
+            return self._connection.execute(sql, parameters)
+
+    def fetchall(self, sql: str, parameters: Iterable = ()) -> list[tuple]:
+        """
+        Run a query and fetch every row
+
+        :param sql: The query
+        :param parameters: The query parameters
+        :return: The rows of the query
+        """
+        with self.lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    @contextmanager
+    def transaction(self) -> Generator[sqlite3.Connection, None, None]:
+        """
+        Run the statements made within the context in a single transaction
+
+        :yield: The database connection
+        """
+        with self.lock:
+            self._connection.execute("BEGIN")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+
+class SlotOutbox:
+    """
+    Durable queue of RaceSync slot pushes. Entries are keyed by slot so a
+    newer push for the same slot replaces a queued one.
+    """
+
+    def __init__(self, path: Union[Path, str]):
+        """
+        Class initalization
+
+        :param path: Location of the database file
+        """
+        self._database = _Database.open(path)
+        """The shared toolkit database"""
+
+        self._database.execute(
+            "CREATE TABLE IF NOT EXISTS slot_outbox ("
+            "race_id TEXT NOT NULL, "
+            "cycle INTEGER NOT NULL, "
+            "heat INTEGER NOT NULL, "
+            "slot INTEGER NOT NULL, "
+            "race_data TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "queued REAL NOT NULL, "
+            "PRIMARY KEY (race_id, cycle, heat, slot))"
+        )
+
+    def put(self, slot_data: SlotData) -> None:
+        """
+        Add a slot push to the outbox, replacing any queued push for the
+        same slot.
+
+        :param slot_data: The slot push
+        """
+        self.put_many([slot_data])
+
+    def put_many(self, slots: list[SlotData]) -> None:
+        """
+        Add slot pushes to the outbox in a single transaction, replacing
+        any queued pushes for the same slots.
+
+        :param slots: The slot pushes
+        """
+        queued = time.time()
+        if not slots:
+            return
+
+        with self._database.transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO slot_outbox "
+                "(race_id, cycle, heat, slot, race_data, queued) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        *self.key(slot_data),
+                        json.dumps(slot_data[4], sort_keys=True),
+                        queued,
+                    )
+                    for slot_data in slots
+                ],
+            )
+
+    def pending(self) -> list[SlotData]:
+        """
+        Get all queued slot pushes in the order they were queued
+
+        :return: The queued slot pushes
+        """
+        rows = self._database.fetchall(
+            "SELECT race_id, cycle, heat, slot, race_data "
+            "FROM slot_outbox ORDER BY queued"
+        )
+
+        return [
+            (race_id, cycle, heat, slot, json.loads(race_data))
+            for race_id, cycle, heat, slot, race_data in rows
+        ]
+
+    def count(self) -> int:
+        """
+        Get the number of queued slot pushes
+
+        :return: The number of queued pushes
+        """
+        return self._database.fetchall("SELECT COUNT(*) FROM slot_outbox")[0][0]
+
+    def complete(self, slot_data: SlotData) -> None:
+        """
+        Remove a pushed slot from the outbox. The entry is kept if it
+        has been replaced with different data since being read.
+
+        :param slot_data: The pushed slot data
+        """
+        self.complete_many([slot_data])
+
+    def complete_many(self, slots: list[SlotData]) -> None:
+        """
+        Remove pushed slots from the outbox in a single transaction. Entries
+        replaced with different data since being read are kept.
+
+        :param slots: The pushed slot data
+        """
+        if not slots:
+            return
+
+        with self._database.transaction() as connection:
+            connection.executemany(
+                "DELETE FROM slot_outbox WHERE race_id = ? AND cycle = ? "
+                "AND heat = ? AND slot = ? AND race_data = ?",
+                [
+                    (*self.key(slot_data), json.dumps(slot_data[4], sort_keys=True))
+                    for slot_data in slots
+                ],
+            )
+
+    def discard_many(self, keys: list[SlotKey]) -> None:
+        """
+        Remove any queued pushes for slots in a single transaction
+
+        :param keys: The slot keys
+        """
+        if not keys:
+            return
+
+        with self._database.transaction() as connection:
+            connection.executemany(
+                "DELETE FROM slot_outbox WHERE race_id = ? AND cycle = ? "
+                "AND heat = ? AND slot = ?",
+                keys,
+            )
+
+    def failed(self, slot_data: SlotData, max_attempts: int) -> bool:
+        """
+        Record a failed push for a slot. The entry is removed once it has
+        failed `max_attempts` times.
+
+        :param slot_data: The slot data that failed to push
+        :param max_attempts: The number of attempts before giving up
+        :return: Whether the entry is still queued
+        """
+        key = self.key(slot_data)
+        with self._database.transaction() as connection:
+            connection.execute(
+                "UPDATE slot_outbox SET attempts = attempts + 1 WHERE race_id = ? "
+                "AND cycle = ? AND heat = ? AND slot = ?",
+                key,
+            )
+            deleted = connection.execute(
+                "DELETE FROM slot_outbox WHERE race_id = ? AND cycle = ? "
+                "AND heat = ? AND slot = ? AND attempts >= ?",
+                (*key, max_attempts),
+            ).rowcount
+
+        if deleted:
+            logger.warning(
+                "Giving up on pushing slot %s to MultiGP after %s attempts",
+                key,
+                max_attempts,
+            )
+
+        return not deleted
+
+    @staticmethod
+    def key(slot_data: SlotData) -> SlotKey:
+        """
+        Get the slot key for slot data
+
+        :param slot_data: The slot data
+        :return: The slot key
+        """
+        race_id, cycle, heat, slot, _ = slot_data
+        return str(race_id), cycle, heat, slot
+
+
+class SlotHistory:
+    """
+    Record of the data last pushed successfully for each RaceSync slot
+    """
+
+    def __init__(self, path: Union[Path, str]):
+        """
+        Class initalization
+
+        :param path: Location of the database file
+        """
+        self._database = _Database.open(path)
+        """The shared toolkit database"""
+
+        self._database.execute(
+            "CREATE TABLE IF NOT EXISTS slot_history ("
+            "race_id TEXT NOT NULL, "
+            "cycle INTEGER NOT NULL, "
+            "heat INTEGER NOT NULL, "
+            "slot INTEGER NOT NULL, "
+            "digest TEXT NOT NULL, "
+            "PRIMARY KEY (race_id, cycle, heat, slot))"
+        )
+
+    @staticmethod
+    def digest(slot_data: SlotData) -> str:
+        """
+        Generate a content hash for the race data of a slot
+
+        :param slot_data: The slot data
+        :return: The hash of the race data
+        """
+        encoded = json.dumps(slot_data[4], sort_keys=True).encode()
+        return hashlib.sha1(encoded).hexdigest()
+
+    def unchanged(self, slot_data: SlotData) -> bool:
+        """
+        Check if the race data matches the last data pushed for the slot
+
+        :param slot_data: The slot data
+        :return: Whether the data is unchanged
+        """
+        rows = self._database.fetchall(
+            "SELECT digest FROM slot_history WHERE race_id = ? AND cycle = ? "
+            "AND heat = ? AND slot = ?",
+            SlotOutbox.key(slot_data),
+        )
+
+        return bool(rows) and rows[0][0] == self.digest(slot_data)
+
+    def record(self, slot_data: SlotData) -> None:
+        """
+        Record the race data successfully pushed for a slot
+
+        :param slot_data: The pushed slot data
+        """
+        self.record_many([slot_data])
+
+    def record_many(self, slots: list[SlotData]) -> None:
+        """
+        Record the race data successfully pushed for slots in a single
+        transaction
+
+        :param slots: The pushed slot data
+        """
+        if not slots:
+            return
+
+        with self._database.transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO slot_history "
+                "(race_id, cycle, heat, slot, digest) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (*SlotOutbox.key(slot_data), self.digest(slot_data))
+                    for slot_data in slots
+                ],
+            )
+
+    def clear(self, race_id: Union[str, int]) -> None:
+        """
+        Forget the pushed data for a race
+
+        :param race_id: The MultiGP race id
+        """
+        self._database.execute(
+            "DELETE FROM slot_history WHERE race_id = ?", (str(race_id),)
+        )
+
+
+class RequestCapture:
+    """
+    Writes would-be API requests to a newline delimited JSON file instead
+    of sending them. The API key is left out of the written payloads.
+    """
+
+    def __init__(self, path: Union[Path, str], append: bool = False):
+        """
+        Class initalization
+
+        :param path: Location of the capture file
+        :param append: Add to an existing capture file instead of replacing it
+        """
+        self.path = path
+        """Location of the capture file"""
+        self.requests = 0
+        """Number of requests written by this capture"""
+        self.bytes = 0
+        """Total size of the request bodies written by this capture"""
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+        """The open capture file"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def write(self, request_type: RequestAction, url: str, payload: dict) -> None:
+        """
+        Write a request to the capture file
+
+        :param request_type: The request type
+        :param url: The url the request would be sent to
+        :param payload: The payload of the request
+        """
+        size = len(json.dumps(payload).encode())
+        record = {
+            "method": request_type.value,
+            "url": url,
+            "payload": {
+                key: value for key, value in payload.items() if key != "apiKey"
+            },
+            "bytes": size,
+        }
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.requests += 1
+        self.bytes += size
+
+    def close(self) -> None:
+        """
+        Close the capture file
+        """
+        self._file.close()
+
+
+class ResponseCache:
+    """
+    Cache of API responses with a time to live for each entry. Entries are
+    kept in memory and, when a database path is provided, persisted so
+    they survive a restart.
+    """
+
+    def __init__(self, path: Union[Path, str, None] = None):
+        """
+        Class initalization
+
+        :param path: Location of the database file. The cache is only held
+        in memory when not provided.
+        """
+        self._lock = RLock()
+        """Lock for cache access"""
+        self._entries: dict[str, tuple[float, str]] = {}
+        """The expiry time and serialized data for each cached key"""
+        self._database: Union[_Database, None] = None
+        """The shared toolkit database"""
+
+        if path is None:
+            return
+
+        self._database = _Database.open(path)
+        self._database.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, "
+            "data TEXT NOT NULL, "
+            "expires REAL NOT NULL)"
+        )
+        self._database.execute(
+            "DELETE FROM response_cache WHERE expires <= ?", (time.time(),)
+        )
+        for key, data, expires in self._database.fetchall(
+            "SELECT key, data, expires FROM response_cache"
+        ):
+            self._entries[key] = (expires, data)
+
+    def get(self, key: str) -> Union[Any, None]:
+        """
+        Get the cached data for a key
+
+        :param key: The cache key
+        :return: A copy of the cached data, or None if not cached or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires, data = entry
+            if expires <= time.time():
+                self.forget(key)
+                return None
+
+        return json.loads(data)
+
+    def put(self, key: str, data: Any, ttl: float) -> None:
+        """
+        Cache data for a key
+
+        :param key: The cache key
+        :param data: The data to cache. Must be JSON serializable.
+        :param ttl: Number of seconds the data stays valid
+        """
+        expires = time.time() + ttl
+        serialized = json.dumps(data)
+
+        with self._lock:
+            self._entries[key] = (expires, serialized)
+            if self._database is not None:
+                self._database.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, data, expires) "
+                    "VALUES (?, ?, ?)",
+                    (key, serialized, expires),
+                )
+
+    def forget(self, key: str) -> None:
+        """
+        Remove a key from the cache
+
+        :param key: The cache key
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return
+
+            if self._database is not None:
+                self._database.execute(
+                    "DELETE FROM response_cache WHERE key = ?", (key,)
+                )
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache
+        """
+        with self._lock:
+            self._entries.clear()
+            if self._database is not None:
+                self._database.execute("DELETE FROM response_cache")
@@ -10,6 +10,8 @@ from collections.abc import Generator
 from pathlib import Path
 from typing import Any, TypeVar, Union
 
+import gevent
+import gevent.pool
 import requests
 from Database import (
     Heat,
@@ -27,6 +29,7 @@ from RHUI import UIField, UIFieldType
 from .enums import DefaultMGPFormats, MGPMode
 from .fpvscoresapi import register_handlers
 from .multigpapi import MultiGPAPI
+from .persistence import DATABASE_NAME, data_path
 from .rsexporter import RaceSyncExporter
 from .rsimporter import RaceSyncImporter
 from .uimanager import UImanager
@@ -64,6 +67,16 @@ logger = logging.getLogger(__name__)
 T = TypeVar("T")
 """Generic for typing"""
 
+CHILD_RACE_DOWNLOADS = 4
+"""Maximum number of child races downloaded at once during an event import"""
+LOGO_META_NAME = "chapter_logo.json"
+"""File name of the sidecar file for the downloaded chapter logo"""
+STARTUP_RETRY_DELAY = 5.0
+"""Seconds to wait before retrying the API key check when MultiGP is
+unreachable on startup"""
+STARTUP_RETRY_MAX_DELAY = 300.0
+"""Maximum seconds between API key checks when MultiGP is unreachable"""
+
 
 class RaceSyncCoordinator:
     """
@@ -76,7 +89,7 @@ class RaceSyncCoordinator:
     def __init__(self, rhapi: RHAPI):
         self._rhapi: RHAPI = rhapi
         """Instance of RHAPI"""
-        self._multigp = MultiGPAPI(self._rhapi)
+        self._multigp = MultiGPAPI(self._rhapi, data_path(self._rhapi, DATABASE_NAME))
         """Instance of the MultiGP API manager"""
         self._ui = UImanager(rhapi, self._multigp)
         """Instance of the toolkit user interface manager"""
@@ -86,6 +99,8 @@ class RaceSyncCoordinator:
             self._rhapi, self._multigp, self._system_verification
         )
         """Instance of the RaceSync exporter"""
+        self._startup: Union[gevent.Greenlet, None] = None
+        """Greenlet verifying the API key and setting up the plugin"""
 
         self._rhapi.events.on(Evt.STARTUP, self.startup, name="startup")
         self._rhapi.events.on(Evt.RACE_STAGE, self.verify_race, name="verify_race")
@@ -116,12 +131,14 @@ class RaceSyncCoordinator:
 
     def startup(self, _args: Union[dict, None] = None):
         """
-        Callback to setup specific features of the plugin on startup
+        Callback to setup specific features of the plugin on startup. The API
+        key is verified in the background so startup is not delayed when
+        MultiGP is unreachable.
 
         :param _args: Args passed to the callback function, defaults to None
         """
         self.register_aux_plugin_attrs()
-        self.verify_creds()
+        self._startup = gevent.spawn(self._verify_creds_until_reachable)
 
     def register_aux_plugin_attrs(self):
         """
@@ -172,6 +189,8 @@ class RaceSyncCoordinator:
         self._rhapi.db.option_set("mgp_event_races", "[]")
         self._rhapi.db.option_set("results_select", "")
         self._rhapi.db.option_set("ranks_select", "")
+        self._exporter.clear_push_checkpoint()
+        self._importer.forget_zippyq_rounds()
         self._ui.update_panels()
 
     def set_frequency_profile(self, args: Union[dict, None] = None):
@@ -189,10 +208,12 @@ class RaceSyncCoordinator:
             self._rhapi.race.frequencyset = fprofile_id
             self._rhapi.ui.broadcast_frequencies()
 
-    def verify_creds(self) -> None:
+    def verify_creds(self) -> bool:
         """
         Verify the chaper api key. Sets up the remaining features of the plugin
         if the chapter's data is found.
+
+        :return: Whether the key was checked. False if MultiGP could not be reached.
         """
 
         key = self._rhapi.db.option("mgp_api_key")
@@ -200,15 +221,56 @@ class RaceSyncCoordinator:
             self._multigp.set_api_key(key)
         else:
             logger.warning("A MultiGP API key has not been entered into the system")
-            return
+            return True
 
-        if chapter_name := self._multigp.pull_chapter():
+        try:
+            chapter_name = self._multigp.pull_chapter(raise_errors=True)
+        except requests.exceptions.RequestException:
+            return False
+
+        if chapter_name:
             self._ui.set_chapter_name(chapter_name)
             logger.info("API key for %s has been recognized", chapter_name)
             self.setup_plugin()
         else:
             logger.warning("MultiGP API key cannot be verified.")
 
+        return True
+
+    def _verify_creds_until_reachable(self) -> None:
+        """
+        Verify the chapter api key, retrying with an increasing delay
+        until MultiGP can be reached. The user is notified when the first
+        attempt fails and when the connection recovers.
+        """
+        if self.verify_creds():
+            return
+
+        message = (
+            "Unable to connect to MultiGP. The toolkit will finish setting up "
+            "once a connection is available."
+        )
+        self._rhapi.ui.message_alert(self._rhapi.language.__(message))
+
+        delay = STARTUP_RETRY_DELAY
+        attempt = 1
+        while True:
+            logger.info(
+                "MultiGP is unreachable (attempt %s). "
+                "Retrying API key verification in %s seconds",
+                attempt,
+                delay,
+            )
+            gevent.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+            attempt += 1
+
+            if self.verify_creds():
+                break
+
+        message = "Connection to MultiGP established."
+        self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+
     def setup_plugin(self) -> None:
         """
         Setup additional system events and setup the UI panels to match
@@ -217,12 +279,32 @@ class RaceSyncCoordinator:
         self._rhapi.events.on(
             Evt.LAPS_SAVE, self._importer.auto_zippyq, name="auto_zippyq"
         )
+        self._rhapi.events.on(
+            Evt.RACE_START,
+            self._importer.start_zippyq_prefetch,
+            name="start_zippyq_prefetch",
+        )
+        self._rhapi.events.on(
+            Evt.LAPS_DISCARD,
+            self._importer.stop_zippyq_prefetch,
+            name="stop_zippyq_prefetch",
+        )
         self._rhapi.events.on(
             Evt.LAPS_SAVE, self._exporter.zippyq_slot_score, name="zippyq_slot_score"
         )
         self._rhapi.events.on(
             Evt.LAPS_RESAVE, self._exporter.zippyq_slot_score, name="zippyq_slot_score"
         )
+        self._rhapi.events.on(
+            Evt.LAPS_SAVE,
+            self._exporter.clear_push_checkpoint,
+            name="clear_push_checkpoint",
+        )
+        self._rhapi.events.on(
+            Evt.LAPS_RESAVE,
+            self._exporter.clear_push_checkpoint,
+            name="clear_push_checkpoint",
+        )
 
         self._rhapi.events.on(
             Evt.CLASS_ADD, self._ui.zq_class_selector, name="update_zq_selector"
@@ -277,6 +359,8 @@ class RaceSyncCoordinator:
         self._ui.create_gq_export_menu(self._exporter.manual_push_results)
 
         self._ui.update_panels()
+        self._exporter.show_push_checkpoint()
+        self._exporter.start_outbox_drain()
 
     def _generate_event_checks(
         self,
@@ -307,35 +391,42 @@ class RaceSyncCoordinator:
             raise RuntimeError("Race data not provided from MultiGP")
 
         if self._rhapi.db.option("auto_logo") == "1":
-            url: str = race_data["chapterImageFileName"]
-            file_name = url.split("/")[-1]
+            gevent.spawn(self._download_logo, race_data["chapterImageFileName"])
 
-            rhapi_verion = (
-                self._rhapi.API_VERSION_MAJOR,
-                self._rhapi.API_VERSION_MINOR,
-            )
-            if rhapi_verion >= (1, 3):
-                data_dir = Path(self._rhapi.server.data_dir)
-                save_dir = data_dir.joinpath("shared")
-                os.makedirs(save_dir, exist_ok=True)
-                save_location = save_dir.joinpath(file_name)
-            else:
-                save_location = Path(f"static/user/{file_name}")
-
-            try:
-                response = requests.get(url, timeout=5)
-            except requests.exceptions.MissingSchema:
-                logger.warning("Chapter logo unavaliable to download")
-                return race_data
-            except requests.Timeout:
-                logger.warning("Timed out when attempting to download logo")
-            else:
-                with open(save_location, mode="wb") as file:
-                    file.write(response.content)
+        return race_data
 
-                self._rhapi.config.set_item("UI", "timerLogo", file_name)
+    def _download_logo(self, url: str) -> None:
+        """
+        Downloads the chapter logo and sets it as the timer logo
 
-        return race_data
+        :param url: The url of the chapter logo
+        """
+        file_name = url.split("/")[-1]
+
+        rhapi_verion = (
+            self._rhapi.API_VERSION_MAJOR,
+            self._rhapi.API_VERSION_MINOR,
+        )
+        if rhapi_verion >= (1, 3):
+            data_dir = Path(self._rhapi.server.data_dir)
+            save_dir = data_dir.joinpath("shared")
+            os.makedirs(save_dir, exist_ok=True)
+            save_location = save_dir.joinpath(file_name)
+        else:
+            save_location = Path(f"static/user/{file_name}")
+
+        try:
+            self._multigp.download(
+                url, save_location, data_path(self._rhapi, LOGO_META_NAME)
+            )
+        except requests.exceptions.MissingSchema:
+            logger.warning("Chapter logo unavaliable to download")
+        except requests.Timeout:
+            logger.warning("Timed out when attempting to download logo")
+        except (requests.exceptions.RequestException, OSError):
+            logger.warning("Failed to download logo", exc_info=True)
+        else:
+            self._rhapi.config.set_item("UI", "timerLogo", file_name)
 
     def _verification_checks(self, race_data: dict) -> bool:
         """
@@ -355,6 +446,42 @@ class RaceSyncCoordinator:
 
         return True
 
+    def _download_child_races(self, races: list[dict]) -> Union[list[dict], None]:
+        """
+        Downloads the race data for each child race of an event concurrently
+
+        :param races: The child races listed in the event data
+        :return: The race data for each child race in the order provided, or
+        None if any download failed
+        """
+        pool = gevent.pool.Pool(CHILD_RACE_DOWNLOADS)
+        greenlets = [
+            pool.spawn(self._multigp.pull_race_data, race["id"]) for race in races
+        ]
+        gevent.joinall(greenlets)
+
+        failed = []
+        for race, greenlet in zip(races, greenlets):
+            if greenlet.exception is not None:
+                logger.error(
+                    "Failed to download MultiGP race %s",
+                    race["id"],
+                    exc_info=greenlet.exc_info,
+                )
+                failed.append(race["name"])
+            elif greenlet.value is None:
+                logger.error("Race data not provided for MultiGP race %s", race["id"])
+                failed.append(race["name"])
+
+        if failed:
+            message = "Event not imported - Failed to download races: {}"
+            self._rhapi.ui.message_alert(
+                self._rhapi.language.__(message).format(", ".join(failed))
+            )
+            return None
+
+        return [greenlet.value for greenlet in greenlets]
+
     def _import_event(self, selected_race: int, race_data: dict) -> None:
         """
         Imports all races from an event into the RotorHazard system
@@ -365,13 +492,26 @@ class RaceSyncCoordinator:
         mgp_event_races = []
 
         if int(race_data["childRaceCount"]) > 0:
-            for race in race_data["races"]:
-                imported_data = self._multigp.pull_race_data(race["id"])
-                self._importer.import_class(race["id"], imported_data)
-                mgp_event_races.append({"mgpid": race["id"], "name": race["name"]})
+            child_data = self._download_child_races(race_data["races"])
+            if child_data is None:
+                return
         else:
-            self._importer.import_class(selected_race, race_data)
-            mgp_event_races.append({"mgpid": selected_race, "name": race_data["name"]})
+            child_data = None
+
+        with self._importer.import_session():
+            if child_data is not None:
+                for race, imported_data in zip(race_data["races"], child_data):
+                    self._importer.import_class(race["id"], imported_data)
+                    mgp_event_races.append({"mgpid": race["id"], "name": race["name"]})
+            else:
+                self._importer.import_class(selected_race, race_data)
+                mgp_event_races.append(
+                    {"mgpid": selected_race, "name": race_data["name"]}
+                )
+
+        for race in mgp_event_races:
+            self._exporter.forget_pushed_slots(race["mgpid"])
+        self._exporter.clear_push_checkpoint()
 
         self._rhapi.db.option_set("mgp_race_id", selected_race)
         self._rhapi.db.option_set("eventName", race_data["name"])
@@ -386,6 +526,7 @@ class RaceSyncCoordinator:
 
         self._rhapi.ui.broadcast_raceclasses()
         self._rhapi.ui.broadcast_raceformats()
+        self._rhapi.ui.broadcast_heats()
         self._rhapi.ui.broadcast_pilots()
         self._rhapi.ui.broadcast_frequencyset()
         self._ui.update_panels()
@@ -412,6 +553,7 @@ class RaceSyncCoordinator:
             self._rhapi.ui.message_alert(self._rhapi.language.__(message))
             return
 
+        self._multigp.clear_cache()
         race_data = self._download_race_data(selected_race)
 
         if self._verification_checks(race_data):
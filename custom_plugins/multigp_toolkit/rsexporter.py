@@ -2,10 +2,15 @@
 Import Data from RaceSync
 """
 
+import hashlib
 import json
 import logging
 import sys
+import time
+import uuid
 from collections.abc import Generator, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any, TypeVar, Union
 
 import gevent
@@ -17,6 +22,15 @@ from RHAPI import RHAPI
 from .enums import MGPMode
 from .fpvscoresapi import FPVScoresAPI
 from .multigpapi import MultiGPAPI
+from .persistence import (
+    DATABASE_NAME,
+    RequestCapture,
+    SlotData,
+    SlotHistory,
+    SlotKey,
+    SlotOutbox,
+    data_path,
+)
 
 try:
     if sys.version_info.minor == 13:
@@ -49,6 +63,259 @@ T = TypeVar("T")
 
 logger = logging.getLogger(__name__)
 
+OUTBOX_RETRY_DELAY = 30.0
+"""Initial delay in seconds before retrying queued slot pushes"""
+OUTBOX_MAX_DELAY = 600.0
+"""Maximum delay in seconds between retries of queued slot pushes"""
+OUTBOX_MAX_ATTEMPTS = 10
+"""Number of failed attempts before a queued slot push is dropped"""
+PROGRESS_INTERVAL = 2.0
+"""Minimum time in seconds between push progress notifications"""
+FAILED_SLOT_REPORT = 10
+"""Maximum number of failed slots listed in the user interface"""
+OUTBOX_BATCH_SIZE = 50
+"""Number of slots written to the toolkit database in each transaction"""
+CHECKPOINT_OPTION = "mgp_push_checkpoint"
+"""Option storing the progress of the last manual results push"""
+DRY_RUN_EVENT_URL = "https://fpvscores.com/dry-run"
+"""Placeholder FPVScores event url written to dry run captures. Looking up
+the real url would make a network request."""
+
+
+@dataclass
+class _PushReport:
+    """
+    Outcome of pushing a stream of slots
+    """
+
+    total: int = 0
+    """Number of slots taken from the stream"""
+    pushed: int = 0
+    """Number of slots pushed successfully"""
+    failed: list[SlotKey] = field(default_factory=list)
+    """Keys of the slots that failed to push"""
+    deferred: int = 0
+    """Number of slots left in the outbox after aborting"""
+    races: dict[str, bool] = field(default_factory=dict)
+    """Status of the push for each MultiGP race"""
+
+    @property
+    def success(self) -> bool:
+        """
+        Whether every slot was pushed successfully
+        """
+        return not self.failed and not self.deferred
+
+    def record(self, slot_data: SlotData, status: Union[bool, None]) -> None:
+        """
+        Record the outcome of a slot
+
+        :param slot_data: The slot data
+        :param status: Status of the push, or None if the slot was not pushed
+        """
+        race_id = str(slot_data[0])
+        self.races[race_id] = self.races.get(race_id, True) and bool(status)
+
+        if status:
+            self.pushed += 1
+        elif status is None:
+            self.deferred += 1
+        else:
+            self.failed.append(SlotOutbox.key(slot_data))
+
+
+class _PushCheckpoint:
+    """
+    Progress of a manual results push through its stages. Stored as a
+    RotorHazard option so an interrupted push can resume from the first
+    incomplete stage.
+    """
+
+    def __init__(self, rhapi: RHAPI, plan: str, stages: list[tuple[str, str]]):
+        """
+        Class initalization. Resumes the stored progress if it was
+        recorded for the same plan.
+
+        :param rhapi: An instance of RHAPI
+        :param plan: Fingerprint of the push settings
+        :param stages: The id and label of each stage in order
+        """
+        self._rhapi = rhapi
+        """A stored instace of the RHAPI module"""
+        self.plan = plan
+        """Fingerprint of the push settings"""
+        self.event_url: Union[str, None] = None
+        """The FPVScores event url found during the push"""
+        self.stages: dict[str, tuple[str, bool]] = {
+            stage: (label, False) for stage, label in stages
+        }
+        """Mapping of stage id to its label and completion"""
+
+        stored = self.load(rhapi)
+        if stored and stored["plan"] == plan:
+            self.event_url = stored["event_url"]
+            for stage, _, done in stored["stages"]:
+                if stage in self.stages:
+                    self.stages[stage] = (self.stages[stage][0], done)
+
+    @staticmethod
+    def load(rhapi: RHAPI) -> Union[dict, None]:
+        """
+        Load the stored push progress
+
+        :param rhapi: An instance of RHAPI
+        :return: The stored progress, or None if there is none
+        """
+        try:
+            return json.loads(rhapi.db.option(CHECKPOINT_OPTION) or "null")
+        except json.JSONDecodeError:
+            return None
+
+    @property
+    def resumed(self) -> bool:
+        """
+        Whether any stage was already completed by a previous push
+        """
+        return any(done for _, done in self.stages.values())
+
+    @property
+    def finished(self) -> bool:
+        """
+        Whether every stage is complete
+        """
+        return all(done for _, done in self.stages.values())
+
+    def done(self, stage: str) -> bool:
+        """
+        Check if a stage is complete
+
+        :param stage: The stage id
+        :return: Whether the stage is complete
+        """
+        return self.stages[stage][1]
+
+    def complete(self, stage: str) -> None:
+        """
+        Mark a stage as complete and store the progress
+
+        :param stage: The stage id
+        """
+        self.stages[stage] = (self.stages[stage][0], True)
+        self.save()
+
+    def save(self) -> None:
+        """
+        Store the progress
+        """
+        data = {
+            "plan": self.plan,
+            "event_url": self.event_url,
+            "stages": [
+                [stage, label, done] for stage, (label, done) in self.stages.items()
+            ],
+        }
+        self._rhapi.db.option_set(CHECKPOINT_OPTION, json.dumps(data))
+
+
+class _PushIndex:
+    """
+    Lookups reused across every race of a results push. Each pilot's
+    and heat's data is read from the database at most once per push.
+    """
+
+    def __init__(self, rhapi: RHAPI):
+        """
+        Class initalization
+
+        :param rhapi: An instance of RHAPI
+        """
+        self._rhapi = rhapi
+        """A stored instace of the RHAPI module"""
+        self._mgp_pilot_ids: dict[int, Union[str, None]] = {}
+        """Mapping of pilot id to MultiGP pilot id"""
+        self._callsigns: dict[int, str] = {}
+        """Mapping of pilot id to callsign"""
+        self.warned: set[int] = set()
+        """Pilots already reported as missing a MultiGP pilot id"""
+        self._heats: dict[int, Heat] = {}
+        """Mapping of heat id to heat"""
+        self._zippyq_rounds: dict[int, int] = {}
+        """Mapping of heat id to ZippyQ round number"""
+
+    def load_class(self, raceclass_id: int, zippyq: bool = False) -> None:
+        """
+        Load the heats of a race class in a single pass
+
+        :param raceclass_id: The id of the race class
+        :param zippyq: Also load the ZippyQ round number of each heat
+        """
+        heat: Heat
+        for heat in self._rhapi.db.heats_by_class(raceclass_id):
+            self._heats[heat.id] = heat
+
+            if zippyq and heat.id not in self._zippyq_rounds:
+                self._zippyq_rounds[heat.id] = self._read_zippyq_round(heat.id)
+
+    def _read_zippyq_round(self, heat_id: int) -> int:
+        """
+        Read the ZippyQ round number of a heat from the database
+
+        :param heat_id: The id of the heat
+        :return: The round number, or 0 if not set
+        """
+        value = self._rhapi.db.heat_attribute_value(heat_id, "zippyq_round_num")
+        return int(value) if value else 0
+
+    def heat(self, heat_id: int) -> Heat:
+        """
+        Gets a heat
+
+        :param heat_id: The id of the heat
+        :return: The heat
+        """
+        if heat_id not in self._heats:
+            self._heats[heat_id] = self._rhapi.db.heat_by_id(heat_id)
+
+        return self._heats[heat_id]
+
+    def zippyq_round(self, heat_id: int) -> int:
+        """
+        Gets the ZippyQ round number of a heat
+
+        :param heat_id: The id of the heat
+        :return: The round number, or 0 if not set
+        """
+        if heat_id not in self._zippyq_rounds:
+            self._zippyq_rounds[heat_id] = self._read_zippyq_round(heat_id)
+
+        return self._zippyq_rounds[heat_id]
+
+    def mgp_pilot_id(self, pilot_id: int) -> Union[str, None]:
+        """
+        Gets the MultiGP id for a pilot
+
+        :param pilot_id: The database id for the pilot
+        :return: The MultiGP pilot id, or None if not set
+        """
+        if pilot_id not in self._mgp_pilot_ids:
+            entry: str = self._rhapi.db.pilot_attribute_value(pilot_id, "mgp_pilot_id")
+            self._mgp_pilot_ids[pilot_id] = entry.strip() if entry else None
+
+        return self._mgp_pilot_ids[pilot_id]
+
+    def callsign(self, pilot_id: int) -> str:
+        """
+        Gets the callsign for a pilot
+
+        :param pilot_id: The database id for the pilot
+        :return: The pilot's callsign
+        """
+        if pilot_id not in self._callsigns:
+            pilot: Pilot = self._rhapi.db.pilot_by_id(pilot_id)
+            self._callsigns[pilot_id] = pilot.callsign
+
+        return self._callsigns[pilot_id]
+
 
 class RaceSyncExporter:
     """Actions for exporting data to RaceSync"""
@@ -76,19 +343,18 @@ class RaceSyncExporter:
         """An instance of FPVScoresAPI"""
         self.active_sync = gevent.lock.BoundedSemaphore()
         """Variable for checking if a results sync is active"""
-
-    def get_mgp_pilot_id(self, pilot_id: int) -> Union[str, None]:
-        """
-        Gets the MultiGP id for a pilot
-
-        :param pilot_id: The database id for the pilot
-        :return: The
-        """
-        entry: str = self._rhapi.db.pilot_attribute_value(pilot_id, "mgp_pilot_id")
-        if entry:
-            return entry.strip()
-
-        return None
+        self._outbox = SlotOutbox(data_path(rhapi, DATABASE_NAME))
+        """Durable queue of slot pushes"""
+        self._history = SlotHistory(data_path(rhapi, DATABASE_NAME))
+        """Record of the data last pushed for each slot"""
+        self._push_lock = gevent.lock.RLock()
+        """Lock to prevent queued and new pushes for a slot from interleaving"""
+        self._drain: Union[gevent.Greenlet, None] = None
+        """Greenlet retrying queued slot pushes"""
+        self._zippyq_capture: Union[Path, None] = None
+        """Capture file that ZippyQ dry runs are appended to"""
+        self._event_url: Union[str, None] = None
+        """The FPVScores event url found by the last results push"""
 
     def generate_formated_race_data(
         self,
@@ -97,16 +363,24 @@ class RaceSyncExporter:
         round_num: int,
         heat_num: int,
         event_url: Union[str, None],
+        index: Union[_PushIndex, None] = None,
     ):
         """
         Generates a slot and score package for each pilot for the provided race
 
         :param race_info: Data for the completed race
         :param event_url: The FPVScores event url
+        :param index: Lookups shared across the push. Created if not provided.
         :yield: Formated race data
         """
         # pylint: disable=R0913
-        results = self._rhapi.db.race_results(race_info.id)["by_race_time"]
+        if index is None:
+            index = _PushIndex(self._rhapi)
+
+        results = {
+            result["pilot_id"]: result
+            for result in self._rhapi.db.race_results(race_info.id)["by_race_time"]
+        }
 
         rh_slot: HeatNode
         for rh_slot in self._rhapi.db.slots_by_heat(race_info.heat_id):
@@ -114,26 +388,23 @@ class RaceSyncExporter:
             if not pilot_id:
                 continue
 
-            for result in results:
-                if result["pilot_id"] == pilot_id:
-                    break
-            else:
-                result = None
+            result = results.get(pilot_id)
 
             slot_num = rh_slot.node_index + 1
             race_data: dict[str, Any] = {}
 
-            mgp_pilot_id = self.get_mgp_pilot_id(pilot_id)
+            mgp_pilot_id = index.mgp_pilot_id(pilot_id)
             if mgp_pilot_id:
                 race_data["pilotId"] = mgp_pilot_id
             else:
-                pilot_info: Pilot = self._rhapi.db.pilot_by_id(pilot_id)
-                message = (
-                    f"{pilot_info.callsign} does not have a "
-                    "MultiGP Pilot ID. Pilot's results will not be pushed..."
-                )
-                logger.warning(message)
-                self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+                if pilot_id not in index.warned:
+                    index.warned.add(pilot_id)
+                    message = (
+                        f"{index.callsign(pilot_id)} does not have a "
+                        "MultiGP Pilot ID. Pilot's results will not be pushed..."
+                    )
+                    logger.warning(message)
+                    self._rhapi.ui.message_notify(self._rhapi.language.__(message))
                 continue
 
             if result is not None:
@@ -162,29 +433,244 @@ class RaceSyncExporter:
 
             yield (selected_race, round_num, heat_num, slot_num, race_data)
 
-    def slot_score(self, collection: Iterable[Generator]) -> bool:
+    def _push_slot(self, slot_data: SlotData) -> bool:
         """
-        Push generated data to MultiGP. Uses a gevent connection pool for parallel
-        connections.
+        Push a queued slot to MultiGP. Failed pushes are recorded in the outbox.
 
-        :param data_generators: Generators for formating data.
+        :param slot_data: The slot data to push
         :return: Status of the push
         """
+        if self._multigp.push_slot_and_score(slot_data):
+            return True
+
+        self._outbox.failed(slot_data, OUTBOX_MAX_ATTEMPTS)
+        return False
+
+    def _complete_slots(self, slots: list[SlotData]) -> None:
+        """
+        Remove pushed slots from the outbox and record their data as pushed
+
+        :param slots: The pushed slot data
+        """
+        self._outbox.complete_many(slots)
+        self._history.record_many(slots)
+
+    def _push_all(
+        self,
+        slots: Iterable[SlotData],
+        total: Union[int, None] = None,
+        progress: bool = False,
+    ) -> _PushReport:
+        """
+        Push a stream of slots in parallel. Slots are taken from the stream
+        only as the adaptive concurrency limit of the MultiGP API manager
+        allows, so memory use does not grow with the number of slots.
+
+        Pushing stops early if the circuit breaker opens. The remaining
+        slots are left in the outbox to be retried in the background.
+        Pushed slots are removed from the outbox in batches.
+
+        :param slots: The slots to push
+        :param total: The number of slots in the stream, if known
+        :param progress: Notify the user of the push progress
+        :return: The outcome of the push
+        """
+        limiter = self._multigp.limiter
+        group = gevent.pool.Group()
+        report = _PushReport()
+        start = last_notice = time.monotonic()
+        completed: list[SlotData] = []
+
+        def push(slot_data: SlotData) -> None:
+            nonlocal last_notice, completed
+            try:
+                status = self._push_slot(slot_data)
+            finally:
+                limiter.release()
+
+            report.record(slot_data, status)
+            if status:
+                completed.append(slot_data)
+                if len(completed) >= OUTBOX_BATCH_SIZE:
+                    batch, completed = completed, []
+                    self._complete_slots(batch)
+
+            now = time.monotonic()
+            if progress and now - last_notice >= PROGRESS_INTERVAL:
+                last_notice = now
+                if total is None:
+                    message = f"{report.pushed} slots pushed..."
+                else:
+                    message = f"{report.pushed}/{total} slots pushed..."
+                self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+
+        for slot_data in slots:
+            report.total += 1
+
+            if report.deferred or self._multigp.circuit_open:
+                report.record(slot_data, None)
+                continue
+
+            limiter.acquire()
+            group.spawn(push, slot_data)
+
+        group.join()
+        self._complete_slots(completed)
+
+        if report.total:
+            elapsed = time.monotonic() - start
+            logger.info(
+                "Pushed %s/%s slots to MultiGP in %.1f seconds (%.1f slots/s). "
+                "Concurrency limit: %s",
+                report.pushed,
+                report.total,
+                elapsed,
+                report.pushed / elapsed if elapsed else 0,
+                limiter.limit,
+            )
+
+        for key in report.failed:
+            logger.warning("Failed to push slot %s to MultiGP", key)
+
+        if report.deferred:
+            logger.warning(
+                "MultiGP unavailable. Deferred %s slot pushes", report.deferred
+            )
+
+        return report
+
+    def _report_push_errors(self, report: _PushReport) -> None:
+        """
+        Notify the user of slots that were not pushed
+
+        :param report: The outcome of the push
+        """
+        if report.deferred:
+            message = (
+                "MultiGP is unavailable. Stopped pushing results with "
+                f"{report.deferred} slots remaining. "
+                "Remaining results will be retried in the background."
+            )
+            self._rhapi.ui.message_alert(self._rhapi.language.__(message))
+
+        if report.failed:
+            failures = ", ".join(
+                f"race {race_id} round {cycle} heat {heat} slot {slot}"
+                for race_id, cycle, heat, slot in report.failed[:FAILED_SLOT_REPORT]
+            )
+            if (remaining := len(report.failed) - FAILED_SLOT_REPORT) > 0:
+                failures += f" and {remaining} more"
+
+            message = (
+                f"Results push to MultiGP FAILED for {len(report.failed)} slots "
+                f"({failures}). Failed results will be retried in the background."
+            )
+            self._rhapi.ui.message_alert(self._rhapi.language.__(message))
+
+    def push_slots(
+        self, collection: Iterable[Generator], force: bool = False
+    ) -> dict[str, bool]:
+        """
+        Push generated data to MultiGP. Uses a gevent connection pool for parallel
+        connections. Slots are pushed as they are generated. They are written
+        to the outbox in batches before being pushed, so failed pushes can be
+        retried in the background.
+
+        Slots matching the data last pushed successfully are skipped unless
+        `force` is set. Slots of different MultiGP races share the same
+        concurrency limit.
+
+        :param collection: Generators for formating data.
+        :param force: Push all slots, including unchanged slots
+        :return: Status of the push for each MultiGP race with pushed slots
+        """
+        skipped = 0
 
         def combined_generators(iterable):
+            nonlocal skipped
+            batch: list[SlotData] = []
+            unchanged: list[SlotKey] = []
             for generator in iterable:
-                yield from generator
+                for slot_data in generator:
+                    if not force and self._history.unchanged(slot_data):
+                        # Drop any queued push of older data for the slot
+                        unchanged.append(SlotOutbox.key(slot_data))
+                        skipped += 1
+                    else:
+                        batch.append(slot_data)
 
-        statuses = gevent.pool.Pool(10).map(
-            self._multigp.push_slot_and_score, combined_generators(collection)
-        )
+                    if len(batch) + len(unchanged) >= OUTBOX_BATCH_SIZE:
+                        self._outbox.discard_many(unchanged)
+                        self._outbox.put_many(batch)
+                        yield from batch
+                        batch, unchanged = [], []
 
-        if not all(statuses):
-            message = "Results push to MultiGP FAILED."
-            self._rhapi.ui.message_alert(self._rhapi.language.__(message))
-            return False
+            self._outbox.discard_many(unchanged)
+            self._outbox.put_many(batch)
+            yield from batch
 
-        return True
+        with self._push_lock:
+            report = self._push_all(combined_generators(collection), progress=True)
+
+        if skipped:
+            logger.info("Skipped pushing %s unchanged slots to MultiGP", skipped)
+
+        if not report.success:
+            self._report_push_errors(report)
+            self.start_outbox_drain()
+
+        return report.races
+
+    def slot_score(self, collection: Iterable[Generator], force: bool = False) -> bool:
+        """
+        Push generated data to MultiGP.
+
+        :param collection: Generators for formating data.
+        :param force: Push all slots, including unchanged slots
+        :return: Status of the push
+        """
+        return all(self.push_slots(collection, force).values())
+
+    def forget_pushed_slots(self, race_id: Union[str, int]) -> None:
+        """
+        Forget the data pushed for a MultiGP race so the next push
+        sends every slot
+
+        :param race_id: The MultiGP race id
+        """
+        self._history.clear(race_id)
+
+    def start_outbox_drain(self) -> None:
+        """
+        Start retrying queued slot pushes in the background if any
+        are queued
+        """
+        if self._outbox.count() and (self._drain is None or self._drain.dead):
+            self._drain = gevent.spawn(self._drain_outbox)
+
+    def _drain_outbox(self) -> None:
+        """
+        Retries queued slot pushes with an increasing delay until the
+        outbox is empty
+        """
+        delay = OUTBOX_RETRY_DELAY
+
+        while True:
+            gevent.sleep(delay)
+
+            with self._push_lock:
+                if not (pending := self._outbox.pending()):
+                    return
+
+                logger.info("Retrying %s queued MultiGP slot pushes", len(pending))
+                report = self._push_all(pending)
+
+            if report.success:
+                message = "Queued results successfully pushed to MultiGP."
+                self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+                return
+
+            delay = min(delay * 2, OUTBOX_MAX_DELAY)
 
     def _generate_fpvscores_conditions(self) -> Generator[bool, None, None]:
         """
@@ -196,13 +682,14 @@ class RaceSyncExporter:
         yield from self._fpvscores.generate_fpvsconditions()
 
     def _bundle_by_group(
-        self, races: list[SavedRaceMeta]
+        self, races: list[SavedRaceMeta], index: _PushIndex
     ) -> dict[int, list[SavedRaceMeta]]:
         """
         Group saved race meta by heat groups and then sorts
         each heat groups based on heat id.
 
         :param races: The saved race meta to organize
+        :param index: Lookups shared across the push
         :return: The sorted heat groups
         """
 
@@ -211,7 +698,7 @@ class RaceSyncExporter:
 
         heat_groups: dict[int, list] = {}
         for race in races:
-            heat: Heat = self._rhapi.db.heat_by_id(race.heat_id)
+            heat = index.heat(race.heat_id)
             if heat.group_id not in heat_groups:
                 heat_groups[heat.group_id] = [race]
             else:
@@ -233,11 +720,10 @@ class RaceSyncExporter:
         """
         groups: dict[int, list] = {}
         for race in races:
-            heat: Heat = self._rhapi.db.heat_by_id(race.heat_id)
-            if heat.id not in groups:
-                groups[heat.id] = [race]
+            if race.heat_id not in groups:
+                groups[race.heat_id] = [race]
             else:
-                groups[heat.id].append(race)
+                groups[race.heat_id].append(race)
 
         return groups
 
@@ -246,6 +732,7 @@ class RaceSyncExporter:
         selected_mgp_race: int,
         event_url: Union[str, None],
         races: list[SavedRaceMeta],
+        index: _PushIndex,
     ) -> Generator[Generator[tuple, None, None], None, None]:
         """
         Parses class data in the `Generate Heat Groups` format
@@ -260,10 +747,11 @@ class RaceSyncExporter:
         :param selected_mgp_race: The selected MultiGP race
         :param event_url: The FPVScores event url
         :param races: The race data
+        :param index: Lookups shared across the push
         :yield: The formated data
         """
 
-        data = self._bundle_by_group(races)
+        data = self._bundle_by_group(races, index)
         for group_id, races_ in data.items():
             heat_index = 1
             for race_info in races_:
@@ -273,6 +761,7 @@ class RaceSyncExporter:
                     group_id + 1,
                     heat_index,
                     event_url,
+                    index,
                 )
                 heat_index += 1
 
@@ -281,6 +770,7 @@ class RaceSyncExporter:
         selected_mgp_race: int,
         event_url: Union[str, None],
         races: list[SavedRaceMeta],
+        index: _PushIndex,
     ) -> Generator[Generator[tuple, None, None], None, None]:
         """
         Parses class data in the `Count Races per Heat` format
@@ -295,6 +785,7 @@ class RaceSyncExporter:
         :param selected_mgp_race: The selected MultiGP race
         :param event_url: The FPVScores event url
         :param races: The race data
+        :param index: Lookups shared across the push
         :yield: The formated data
         """
 
@@ -308,6 +799,7 @@ class RaceSyncExporter:
                     race_info.round_id,
                     heat_index,
                     event_url,
+                    index,
                 )
 
             heat_index += 1
@@ -317,6 +809,7 @@ class RaceSyncExporter:
         selected_mgp_race: int,
         event_url: Union[str, None],
         races: list[SavedRaceMeta],
+        index: _PushIndex,
     ) -> Generator[Generator[tuple, None, None], None, None]:
         """
         Parses class data to be compatible with ZippyQ.
@@ -326,23 +819,19 @@ class RaceSyncExporter:
         :param selected_mgp_race: The selected MultiGP race
         :param event_url: The FPVScores event url
         :param races: The race data
+        :param index: Lookups shared across the push
         :yield: The formated data
         """
 
         for race_info in races:
-            round_num = int(
-                self._rhapi.db.heat_attribute_value(
-                    race_info.heat_id, "zippyq_round_num"
-                )
-            )
-
-            if round_num:
+            if round_num := index.zippyq_round(race_info.heat_id):
                 yield self.generate_formated_race_data(
                     race_info,
                     selected_mgp_race,
                     round_num,
                     1,
                     event_url,
+                    index,
                 )
 
     def _parse_incremental_round_data(
@@ -350,6 +839,7 @@ class RaceSyncExporter:
         selected_mgp_race: int,
         event_url: Union[str, None],
         races: list[SavedRaceMeta],
+        index: _PushIndex,
     ) -> Generator[Generator[tuple, None, None], None, None]:
         """
         Parses class data to be compatible with brackets or ladders.
@@ -360,6 +850,7 @@ class RaceSyncExporter:
         :param selected_mgp_race: The selected MultiGP race
         :param event_url: The FPVScores event url
         :param races: The race data
+        :param index: Lookups shared across the push
         :yield: The formated data
         """
 
@@ -367,72 +858,75 @@ class RaceSyncExporter:
             return race_info.id
 
         races.sort(key=id_from_race)
-        for index, race_info in enumerate(races, start=1):
+        for round_num, race_info in enumerate(races, start=1):
             yield self.generate_formated_race_data(
                 race_info,
                 selected_mgp_race,
-                index,
+                round_num,
                 1,
                 event_url,
+                index,
             )
 
-    def raceclass_slot_score(
+    def _raceclass_score_data(
         self,
         selected_mgp_race: int,
         selected_rh_class: int,
         event_url: Union[str, None],
-    ):
+        index: _PushIndex,
+    ) -> Generator[Generator[tuple, None, None], None, None]:
         """
-        Pushes race results for a selected RotorHazard class to a specific
-        MultiGP race. Typically trigger by a manual button press in the
-        user interface.
+        Generates the slot data of a RotorHazard class for a MultiGP race
+        using the parser matching the class format.
 
         :param selected_mgp_race: The MultiGP race to push to.
         :param selected_rh_class: The selected RotorHazard class id
-        :param event_url: The FPVScores
+        :param event_url: The FPVScores event url
+        :param index: Lookups shared across the push
+        :yield: The formated data
         """
+        mgp_mode = self._rhapi.db.raceclass_attribute_value(
+            selected_rh_class, "mgp_mode"
+        )
+        index.load_class(selected_rh_class, mgp_mode == MGPMode.ZIPPYQ)
 
         def generate_score_data(races: list[SavedRaceMeta]):
             raceclass: RaceClass = self._rhapi.db.raceclass_by_id(selected_rh_class)
 
-            if (
-                self._rhapi.db.raceclass_attribute_value(selected_rh_class, "mgp_mode")
-                == MGPMode.ZIPPYQ
-            ):
-                yield from self._parse_zippyq_data(selected_mgp_race, event_url, races)
+            if mgp_mode == MGPMode.ZIPPYQ:
+                yield from self._parse_zippyq_data(
+                    selected_mgp_race, event_url, races, index
+                )
 
-            elif (
-                self._rhapi.db.raceclass_attribute_value(selected_rh_class, "mgp_mode")
-                == MGPMode.BRACKET
-            ):
+            elif mgp_mode == MGPMode.BRACKET:
                 yield from self._parse_incremental_round_data(
-                    selected_mgp_race, event_url, races
+                    selected_mgp_race, event_url, races, index
                 )
 
             elif raceclass.round_type == 1:
                 yield from self._parse_heat_group_data(
-                    selected_mgp_race, event_url, races
+                    selected_mgp_race, event_url, races, index
                 )
 
             else:
-                yield from self._parse_heat_data(selected_mgp_race, event_url, races)
+                yield from self._parse_heat_data(
+                    selected_mgp_race, event_url, races, index
+                )
 
         races: list[SavedRaceMeta] = self._rhapi.db.races_by_raceclass(
             selected_rh_class
         )
 
-        if not self.slot_score(generate_score_data(races)):
-            return False
-
-        message = "Results successfully pushed to MultiGP."
-        self._rhapi.ui.message_notify(self._rhapi.language.__(message))
-        return True
+        yield from generate_score_data(races)
 
-    def _rankings_from_leaderboard_data(self, data: dict) -> list[dict]:
+    def _rankings_from_leaderboard_data(
+        self, data: dict, index: _PushIndex
+    ) -> list[dict]:
         """
         Generates formated pilot rankings from leaderboard data
 
         :param data: The input leaderboard data
+        :param index: Lookups shared across the push
         :return: Formated ranking data
         """
         rankings = []
@@ -440,9 +934,7 @@ class RaceSyncExporter:
         for pilot in data:
             pilot_id = int(pilot["pilot_id"])
 
-            if multigp_id := self._rhapi.db.pilot_attribute_value(
-                pilot_id, "mgp_pilot_id"
-            ):
+            if multigp_id := index.mgp_pilot_id(pilot_id):
                 class_position = pilot["position"]
                 result_dict = {
                     "orderNumber": class_position,
@@ -459,19 +951,48 @@ class RaceSyncExporter:
         return rankings
 
     def push_bracketed_rankings(
-        self, selected_mgp_race: str, selected_rh_class: int
-    ) -> bool:
+        self,
+        selected_mgp_race: str,
+        selected_rh_class: int,
+        index: Union[_PushIndex, None] = None,
+    ) -> Union[bool, None]:
         """
         Pushes the overall rankings of the selected RotorHazard race class
         to the MultiGP race.
 
         :param selected_mgp_race: The set MultiGP race
         :param selected_rh_class: The selected RotorHazard race class
-        :return: Status
+        :param index: Lookups shared across the push. Created if not provided.
+        :return: Status, or None if the class has no rankings to push
+        """
+        if index is None:
+            index = _PushIndex(self._rhapi)
+
+        if (rankings := self._bracketed_rankings(selected_rh_class, index)) is None:
+            return None
+
+        if self._multigp.push_overall_race_results(selected_mgp_race, rankings):
+            message = "Rankings pushed to MultiGP"
+            self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+            return True
+
+        message = "Failed to push rankings to MultiGP"
+        self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+        return False
+
+    def _bracketed_rankings(
+        self, selected_rh_class: int, index: _PushIndex
+    ) -> Union[list[dict], None]:
+        """
+        Generates the overall rankings of a RotorHazard race class
+
+        :param selected_rh_class: The selected RotorHazard race class
+        :param index: Lookups shared across the push
+        :return: The formated rankings, or None if the class is not ranked
         """
 
         if selected_rh_class == "" or selected_rh_class is None:
-            return False
+            return None
 
         if rankings := self._rhapi.db.raceclass_ranking(selected_rh_class):
             win_condition = None
@@ -483,52 +1004,115 @@ class RaceSyncExporter:
             data = results_list[primary_leaderboard]
 
         else:
-            return False
+            return None
 
         if rankings or (results_list and win_condition):
-            rankings_ = self._rankings_from_leaderboard_data(data)
+            return self._rankings_from_leaderboard_data(data, index)
 
-            if self._multigp.push_overall_race_results(selected_mgp_race, rankings_):
-                message = "Rankings pushed to MultiGP"
-                self._rhapi.ui.message_notify(self._rhapi.language.__(message))
-                return True
-
-            message = "Failed to push rankings to MultiGP"
-            self._rhapi.ui.message_notify(self._rhapi.language.__(message))
-
-        return False
+        return None
 
-    def raceclass_rankings_push(self) -> bool:
+    def raceclass_rankings_push(
+        self, race_ids: Union[Iterable[str], None] = None
+    ) -> dict[str, bool]:
         """
         Trigger a rankings push to all imported MultiGP races
 
-        :return: Push status
+        :param race_ids: Limit the push to these MultiGP races, defaults to all
+        :return: Status of the push for each MultiGP race attempted
         """
         gq_active = self._rhapi.db.option("global_qualifer_event") == "1"
+        push_index = _PushIndex(self._rhapi)
+        selected = None if race_ids is None else {str(id_) for id_ in race_ids}
+        statuses: dict[str, bool] = {}
 
         for index, race in enumerate(
             json.loads(self._rhapi.db.option("mgp_event_races"))
         ):
+            if selected is not None and str(race["mgpid"]) not in selected:
+                continue
+
+            race_id = str(race["mgpid"])
+
             if gq_active:
                 if self._verification.capture_race_results(race["mgpid"]):
+                    statuses[race_id] = True
                     message = "Successfully processed Global Qualifer race results"
                     self._rhapi.ui.message_notify(self._rhapi.language.__(message))
                 else:
+                    statuses[race_id] = False
                     message = "Failed to process Global Qualifer race results"
                     self._rhapi.ui.message_notify(self._rhapi.language.__(message))
-                    return False
+                    return statuses
             else:
-                self.push_bracketed_rankings(
-                    race["mgpid"], self._rhapi.db.option(f"ranks_select_{index}")
+                status = self.push_bracketed_rankings(
+                    race["mgpid"],
+                    self._rhapi.db.option(f"ranks_select_{index}"),
+                    push_index,
                 )
+                statuses[race_id] = status is not False
 
-        return True
+        return statuses
 
-    def raceclass_results_push(self, event_url: Union[str, None] = None) -> bool:
+    def raceclass_results_push(
+        self,
+        event_url: Union[str, None] = None,
+        force: bool = False,
+        race_ids: Union[Iterable[str], None] = None,
+    ) -> dict[str, bool]:
+        """
+        Trigger a results push to all imported MultiGP races. The slots of
+        every race are pushed concurrently under a shared concurrency limit.
+
+        :param event_url: The FPVScores event url
+        :param force: Push all slots, including slots unchanged since the last push
+        :param race_ids: Limit the push to these MultiGP races, defaults to all
+        :return: Status of the push for each MultiGP race
         """
-        Trigger a results push to all imported MultiGP races
+        if (targets := self._results_targets()) is None:
+            return {}
+
+        if race_ids is not None:
+            selected = {str(id_) for id_ in race_ids}
+            targets = [
+                (race, class_id)
+                for race, class_id in targets
+                if str(race["mgpid"]) in selected
+            ]
+
+        push_index = _PushIndex(self._rhapi)
+        pushed = self.push_slots(
+            (
+                self._raceclass_score_data(
+                    race["mgpid"], class_id, event_url, push_index
+                )
+                for race, class_id in targets
+            ),
+            force,
+        )
+
+        statuses: dict[str, bool] = {}
+        for race, _ in targets:
+            race_id = str(race["mgpid"])
+            statuses[race_id] = pushed.get(race_id, True)
+
+            if statuses[race_id]:
+                message = f"Results for {race['name']} successfully pushed to MultiGP."
+            else:
+                message = f"Results push for {race['name']} FAILED."
+            self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+
+        return statuses
+
+    def _results_targets(self) -> Union[list[tuple[dict, int]], None]:
+        """
+        Pair each imported MultiGP race with the RotorHazard class to
+        push results from
+
+        :return: The imported races paired with their class id, or None
+        if an imported Global Qualifier class is missing
         """
         gq_active = self._rhapi.db.option("global_qualifer_event") == "1"
+        targets: list[tuple[dict, int]] = []
 
         for index, race in enumerate(
             json.loads(self._rhapi.db.option("mgp_event_races"))
@@ -544,19 +1128,135 @@ class RaceSyncExporter:
                 else:
                     message = "Imported Global Qualifier class not found... aborting results push"
                     self._rhapi.ui.message_notify(self._rhapi.language.__(message))
-                    return False
+                    return None
 
-                if self.raceclass_slot_score(race["mgpid"], rh_class.id, event_url):
-                    return True
+                targets.append((race, rh_class.id))
             else:
-                if self.raceclass_slot_score(
-                    race["mgpid"],
-                    self._rhapi.db.option(f"results_select_{index}"),
-                    event_url,
-                ):
-                    return True
+                targets.append((race, self._rhapi.db.option(f"results_select_{index}")))
 
-        return False
+        return targets
+
+    def _dry_run_path(self) -> Path:
+        """
+        Generate a unique location for a dry run capture file in the data
+        directory
+
+        :return: The location of the capture file
+        """
+        file_name = (
+            f"dry_run_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.ndjson"
+        )
+        return data_path(self._rhapi, file_name)
+
+    def _dry_run_event_url(self) -> Union[str, None]:
+        """
+        Get the event url to use in dry run captures without making
+        a network request. Uses the url found by the last results push so
+        slots can be compared with the data last pushed.
+
+        :return: The last known url, or a placeholder url if an FPVScores
+        event is linked
+        """
+        if self._rhapi.db.option("event_uuid_toolkit"):
+            return self._event_url or DRY_RUN_EVENT_URL
+
+        return None
+
+    def _capture_slots(
+        self,
+        capture: RequestCapture,
+        collection: Iterable[Generator],
+        force: bool = False,
+    ) -> tuple[int, int]:
+        """
+        Write the requests for generated slot data to a capture file. Slots
+        matching the data last pushed are skipped unless `force` is set,
+        as they would be by a real push.
+
+        :param capture: The request capture
+        :param collection: Generators for formating data.
+        :param force: Capture all slots, including unchanged slots
+        :return: The number of slots captured and skipped
+        """
+        count = skipped = 0
+        for generator in collection:
+            for slot_data in generator:
+                if not force and self._history.unchanged(slot_data):
+                    skipped += 1
+                    continue
+
+                capture.write(*self._multigp.slot_request(slot_data))
+                count += 1
+
+        return count, skipped
+
+    def _report_dry_run(self, capture: RequestCapture, skipped: int) -> None:
+        """
+        Notify the user of a completed dry run
+
+        :param capture: The request capture
+        :param skipped: The number of unchanged slots skipped
+        """
+        message = (
+            f"Dry run complete. {capture.requests} requests "
+            f"({capture.bytes} bytes) written to {capture.path}. "
+            f"{skipped} unchanged slots skipped."
+        )
+        logger.info(message)
+        self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+
+    def raceclass_results_dry_run(
+        self, event_url: Union[str, None] = None, force: bool = False
+    ) -> None:
+        """
+        Generate the results and rankings for all imported MultiGP races
+        and write the requests to a file instead of pushing them. Reports
+        the generation time for each class.
+
+        :param event_url: The FPVScores event url
+        :param force: Capture all slots, including unchanged slots
+        """
+        if (targets := self._results_targets()) is None:
+            return
+
+        gq_active = self._rhapi.db.option("global_qualifer_event") == "1"
+        push_index = _PushIndex(self._rhapi)
+
+        total_skipped = 0
+        with RequestCapture(self._dry_run_path()) as capture:
+            for index, (race, class_id) in enumerate(targets):
+                start = time.monotonic()
+                count, skipped = self._capture_slots(
+                    capture,
+                    self._raceclass_score_data(
+                        race["mgpid"], class_id, event_url, push_index
+                    ),
+                    force,
+                )
+                elapsed = time.monotonic() - start
+                total_skipped += skipped
+
+                message = (
+                    f"Dry run: generated {count + skipped} slots for {race['name']} "
+                    f"in {elapsed:.2f} seconds ({skipped} unchanged)"
+                )
+                logger.info(message)
+                self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+
+                if gq_active:
+                    continue
+
+                rankings = self._bracketed_rankings(
+                    self._rhapi.db.option(f"ranks_select_{index}"), push_index
+                )
+                if rankings is not None:
+                    capture.write(
+                        *self._multigp.overall_race_results_request(
+                            race["mgpid"], rankings
+                        )
+                    )
+
+        self._report_dry_run(capture, total_skipped)
 
     def _gq_push_checks(self) -> bool:
         """
@@ -593,7 +1293,7 @@ class RaceSyncExporter:
             if not self._rhapi.db.option("event_uuid_toolkit"):
                 return False, None
 
-            event_url = self._fpvscores.get_event_url()
+            event_url = self._event_url = self._fpvscores.get_event_url()
             self._rhapi.ui.broadcast_ui("format")
 
         else:
@@ -622,6 +1322,38 @@ class RaceSyncExporter:
         ):
             return
 
+        selected_race = self._rhapi.db.raceclass_attribute_value(
+            class_id, "mgp_raceclass_id"
+        )
+
+        if self._rhapi.db.option("mgp_dry_run") == "1":
+            if self._zippyq_capture is None:
+                self._zippyq_capture = self._dry_run_path()
+
+            with RequestCapture(self._zippyq_capture, append=True) as capture:
+                start = time.monotonic()
+                count, skipped = self._capture_slots(
+                    capture,
+                    [
+                        self.generate_formated_race_data(
+                            race_info,
+                            selected_race,
+                            round_num,
+                            1,
+                            self._dry_run_event_url(),
+                        )
+                    ],
+                )
+                elapsed = time.monotonic() - start
+
+            logger.info(
+                "Dry run: generated %s ZippyQ slots in %.2f seconds",
+                count + skipped,
+                elapsed,
+            )
+            self._report_dry_run(capture, skipped)
+            return
+
         gq_active = self._rhapi.db.option("global_qualifer_event") == "1"
         if gq_active and not self._gq_push_checks():
             return
@@ -629,16 +1361,12 @@ class RaceSyncExporter:
         message = "Automatically uploading ZippyQ data to MultiGP..."
         self._rhapi.ui.message_notify(self._rhapi.language.__(message))
 
-        selected_race = self._rhapi.db.raceclass_attribute_value(
-            class_id, "mgp_raceclass_id"
-        )
-
         heat_ids: list[Heat] = []
         heat: Heat
         for heat in self._rhapi.db.heats_by_class(class_id):
             heat_ids.append(heat.id)
 
-        event_url = self._fpvscores.get_event_url()
+        event_url = self._event_url = self._fpvscores.get_event_url()
 
         if self.slot_score(
             [
@@ -688,12 +1416,138 @@ class RaceSyncExporter:
                     self._rhapi.ui.message_notify(self._rhapi.language.__(message))
                     return
 
-        status, event_url = self._run_fpvscores_sync(gq_active)
-        if status is False:
+        if self._rhapi.db.option("mgp_dry_run") == "1":
+            message = "Starting results push dry run..."
+            self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+            self.raceclass_results_dry_run(
+                self._dry_run_event_url(),
+                self._rhapi.db.option("mgp_force_push") == "1",
+            )
             return
 
+        if (targets := self._results_targets()) is None:
+            return
+
+        force = self._rhapi.db.option("mgp_force_push") == "1"
+        checkpoint = self._push_checkpoint(gq_active, force, targets)
+
+        if checkpoint.resumed:
+            message = "Resuming the previous results push..."
+            self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+
+        if not checkpoint.done("fpvscores"):
+            status, checkpoint.event_url = self._run_fpvscores_sync(gq_active)
+            if status is False:
+                return
+
+            checkpoint.complete("fpvscores")
+            self._show_checkpoint(checkpoint)
+
         message = "Starting to push results to MultiGP..."
         self._rhapi.ui.message_notify(self._rhapi.language.__(message))
 
-        if self.raceclass_results_push(event_url):
-            self.raceclass_rankings_push()
+        race_ids = [str(race["mgpid"]) for race, _ in targets]
+        if remaining := [
+            id_ for id_ in race_ids if not checkpoint.done(f"slots_{id_}")
+        ]:
+            statuses = self.raceclass_results_push(
+                checkpoint.event_url, force, remaining
+            )
+            for race_id, status in statuses.items():
+                if status:
+                    checkpoint.complete(f"slots_{race_id}")
+            self._show_checkpoint(checkpoint)
+
+        if remaining := [
+            id_
+            for id_ in race_ids
+            if checkpoint.done(f"slots_{id_}")
+            and not checkpoint.done(f"rankings_{id_}")
+        ]:
+            for race_id, status in self.raceclass_rankings_push(remaining).items():
+                if status:
+                    checkpoint.complete(f"rankings_{race_id}")
+            self._show_checkpoint(checkpoint)
+
+        if checkpoint.finished:
+            self.clear_push_checkpoint()
+
+    def _push_checkpoint(
+        self, gq_active: bool, force: bool, targets: list[tuple[dict, int]]
+    ) -> _PushCheckpoint:
+        """
+        Get the checkpoint for a manual results push. Progress stored for a
+        push with different settings is discarded.
+
+        :param gq_active: Whether the event is a Global Qualifier
+        :param force: Whether unchanged slots are pushed
+        :param targets: The imported races paired with their class id
+        :return: The checkpoint
+        """
+        races = json.loads(self._rhapi.db.option("mgp_event_races"))
+        settings = [
+            gq_active,
+            force,
+            self._rhapi.db.option("push_fpvs"),
+            [
+                [
+                    race["mgpid"],
+                    class_id,
+                    self._rhapi.db.option(f"ranks_select_{index}"),
+                ]
+                for index, (race, class_id) in enumerate(targets)
+            ],
+        ]
+        plan = hashlib.sha1(json.dumps(settings).encode()).hexdigest()
+
+        stages = [("fpvscores", "FPVScores sync")]
+        for race in races:
+            stages.append((f"slots_{race['mgpid']}", f"{race['name']} results"))
+        for race in races:
+            stages.append((f"rankings_{race['mgpid']}", f"{race['name']} rankings"))
+
+        return _PushCheckpoint(self._rhapi, plan, stages)
+
+    def _show_checkpoint(self, checkpoint: Union[_PushCheckpoint, None]) -> None:
+        """
+        Display the progress of the manual results push
+
+        :param checkpoint: The checkpoint to display, or None to clear the display
+        """
+        if checkpoint is None:
+            self._rhapi.ui.register_markdown("results_controls", "push_checkpoint", "")
+            return
+
+        lines = ["**Last Results Push**", ""]
+        for label, done in checkpoint.stages.values():
+            lines.append(f"- {label}: {'Complete' if done else 'Incomplete'}")
+
+        self._rhapi.ui.register_markdown(
+            "results_controls", "push_checkpoint", "\n".join(lines)
+        )
+
+    def show_push_checkpoint(self, _args: Union[dict, None] = None) -> None:
+        """
+        Display the stored progress of an incomplete manual results push
+
+        :param _args: Callback args, defaults to None
+        """
+        if stored := _PushCheckpoint.load(self._rhapi):
+            checkpoint = _PushCheckpoint(
+                self._rhapi,
+                stored["plan"],
+                [(stage, label) for stage, label, _ in stored["stages"]],
+            )
+            self._show_checkpoint(checkpoint)
+        else:
+            self._show_checkpoint(None)
+
+    def clear_push_checkpoint(self, _args: Union[dict, None] = None) -> None:
+        """
+        Forget the progress of the manual results push. Typically called
+        when results are saved or the event is reset.
+
+        :param _args: Callback args, defaults to None
+        """
+        self._rhapi.db.option_set(CHECKPOINT_OPTION, "")
+        self._show_checkpoint(None)
@@ -4,9 +4,15 @@ Import Data from RaceSync
 
 import json
 import logging
+import time
 from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import zip_longest
 from typing import TypeVar, Union
 
+import gevent
+import gevent.event
 from Database import (
     Heat,
     HeatAdvanceType,
@@ -29,6 +35,199 @@ T = TypeVar("T")
 logger = logging.getLogger(__name__)
 """Logger for the module"""
 
+ZIPPYQ_POLL_INTERVAL = 5.0
+"""Time in seconds between polls for the next ZippyQ round during a race"""
+ZIPPYQ_PREFETCH_MAX_AGE = 15.0
+"""Maximum age in seconds of a prefetched ZippyQ round before it is refetched"""
+ZIPPYQ_PREFETCH_TIMEOUT = 900.0
+"""Maximum time in seconds to keep polling for the next ZippyQ round"""
+
+
+@dataclass
+class _ZippyQRound:
+    """
+    A ZippyQ round downloaded from RaceSync that has not been imported
+    """
+
+    raceclass_id: int
+    """The raceclass the round is for"""
+    requested_round: int
+    """The round number that was requested"""
+    round_num: int
+    """The round number provided by RaceSync"""
+    data: dict[str, list]
+    """The downloaded round data"""
+    fetched: float
+    """Monotonic time the round was downloaded"""
+
+
+class _PilotIndex:
+    """
+    Index of RotorHazard pilots by MultiGP pilot id. Pilots and their
+    attributes are read lazily and cached for the whole of an import, so
+    each pilot is looked up and written at most once.
+    """
+
+    def __init__(self, rhapi: RHAPI):
+        """
+        Class initalization
+
+        :param rhapi: An instance of RHAPI
+        """
+        self._rhapi = rhapi
+        """A stored instace of the RHAPI module"""
+        self._pilots: dict[str, tuple[int, Union[dict[str, str], None]]] = {}
+        """Mapping of MultiGP pilot id to the RotorHazard pilot id and its
+        attributes. Attributes are None until read from the database"""
+
+    def _read_attributes(self, pilot_id: int) -> dict[str, str]:
+        """
+        Read the attributes of a pilot from the database
+
+        :param pilot_id: The id of the pilot
+        :return: Mapping of attribute name to value
+        """
+        return {
+            attr.name: attr.value for attr in self._rhapi.db.pilot_attributes(pilot_id)
+        }
+
+    def find(self, mgp_pilot_id: str) -> Union[int, None]:
+        """
+        Find the RotorHazard pilot for a MultiGP pilot
+
+        :param mgp_pilot_id: The MultiGP pilot id
+        :return: The id of the RotorHazard pilot, or None if not found
+        """
+        key = str(mgp_pilot_id)
+
+        if key not in self._pilots:
+            if ids := self._rhapi.db.pilot_ids_by_attribute(
+                "mgp_pilot_id", mgp_pilot_id
+            ):
+                self._pilots[key] = (ids[0], None)
+
+        if (entry := self._pilots.get(key)) is None:
+            return None
+
+        return entry[0]
+
+    def add(self, mgp_pilot_id: str, pilot_id: int) -> None:
+        """
+        Index a newly created pilot
+
+        :param mgp_pilot_id: The MultiGP pilot id
+        :param pilot_id: The id of the RotorHazard pilot
+        """
+        self._pilots[str(mgp_pilot_id)] = (pilot_id, {})
+
+    def update(self, mgp_pilot_id: str, attrs: dict[str, T]) -> None:
+        """
+        Write the attributes of an indexed pilot. Attributes matching the
+        stored values are skipped.
+
+        :param mgp_pilot_id: The MultiGP pilot id
+        :param attrs: The attributes to write
+        """
+        key = str(mgp_pilot_id)
+        pilot_id, current = self._pilots[key]
+
+        if current is None:
+            current = self._read_attributes(pilot_id)
+            self._pilots[key] = (pilot_id, current)
+
+        changes = {
+            name: value
+            for name, value in attrs.items()
+            if current.get(name) != str(value)
+        }
+
+        if changes:
+            self._rhapi.db.pilot_alter(pilot_id, attributes=changes)
+            current.update({name: str(value) for name, value in changes.items()})
+
+
+FrequencyKey = tuple[tuple[Union[str, None], Union[int, None], int], ...]
+"""Canonical form of a frequency set. (band, channel, frequency) for each seat"""
+
+
+def _frequency_key(frequencyset: dict[str, list]) -> FrequencyKey:
+    """
+    Generate the canonical form of a frequency set. Independent of the key
+    order and value types of the stored JSON.
+
+    :param frequencyset: The frequency set
+    :return: The canonical frequency set
+    """
+    return tuple(
+        (
+            band or None,
+            int(channel) if channel else None,
+            int(frequency) if frequency else 0,
+        )
+        for band, channel, frequency in zip_longest(
+            frequencyset.get("b", []),
+            frequencyset.get("c", []),
+            frequencyset.get("f", []),
+        )
+    )
+
+
+class _ProfileIndex:
+    """
+    Index of frequency profiles by their canonical frequency set
+    """
+
+    def __init__(self, rhapi: RHAPI):
+        """
+        Class initalization. Reads every frequency profile in a single pass.
+
+        :param rhapi: An instance of RHAPI
+        """
+        self._rhapi = rhapi
+        """A stored instace of the RHAPI module"""
+        self._profiles: dict[FrequencyKey, int] = {}
+        """Mapping of canonical frequency set to profile id"""
+        self._names: set[str] = set()
+        """Names of the existing profiles"""
+
+        profile: Profiles
+        for profile in rhapi.db.frequencysets:
+            self._names.add(profile.name)
+            try:
+                key = _frequency_key(json.loads(profile.frequencies))
+            except (TypeError, ValueError, AttributeError):
+                continue
+            self._profiles.setdefault(key, profile.id)
+
+    def find(self, frequencyset: dict[str, list]) -> Union[int, None]:
+        """
+        Find the profile matching a frequency set
+
+        :param frequencyset: The frequency set
+        :return: The id of the profile, or None if not found
+        """
+        return self._profiles.get(_frequency_key(frequencyset))
+
+    def add(self, frequencyset: dict[str, list]) -> int:
+        """
+        Create and index a new profile for a frequency set
+
+        :param frequencyset: The frequency set
+        :return: The id of the new profile
+        """
+        index = 1
+        base = "MultiGP Profile"
+        while f"{base} {index}" in self._names:
+            index += 1
+
+        profile: Profiles = self._rhapi.db.frequencyset_add(
+            name=f"{base} {index}", frequencies=json.dumps(frequencyset)
+        )
+        self._names.add(profile.name)
+        self._profiles[_frequency_key(frequencyset)] = profile.id
+
+        return profile.id
+
 
 class RaceSyncImporter:
     """Actions for importing data from RaceSync"""
@@ -51,6 +250,35 @@ class RaceSyncImporter:
         """A stored instace of the MultiGPAPI module"""
         self._zippq_lock = BoundedSemaphore()
         """Lock for ensuring zippyq pulls"""
+        self._pilots: Union[_PilotIndex, None] = None
+        """Pilot index for the active import"""
+        self._profiles: Union[_ProfileIndex, None] = None
+        """Frequency profile index for the active import"""
+        self._current_rounds: dict[str, int] = {}
+        """Last known current ZippyQ round of each MultiGP race"""
+        self._prefetched: Union[_ZippyQRound, None] = None
+        """The latest ZippyQ round downloaded in the background"""
+        self._prefetcher: Union[gevent.Greenlet, None] = None
+        """Greenlet polling for the next ZippyQ round"""
+        self._prefetch_stop = gevent.event.Event()
+        """Event for stopping the active ZippyQ prefetcher"""
+
+    @contextmanager
+    def import_session(self) -> Generator[None, None, None]:
+        """
+        Share a single pilot and frequency profile index across every search
+        made within the context. Nested sessions reuse the outer indexes.
+        """
+        if self._pilots is not None:
+            yield
+            return
+
+        self._pilots = _PilotIndex(self._rhapi)
+        try:
+            yield
+        finally:
+            self._pilots = None
+            self._profiles = None
 
     def pilot_search(
         self, mgp_pilot: dict[str, T], *, update_attrs: bool = False
@@ -64,11 +292,9 @@ class RaceSyncImporter:
         :param update_attrs: Update the pilot attributes even when seaching for pilot
         :return: The id of the RH pilot that was either matched or created
         """
-        if ids := self._rhapi.db.pilot_ids_by_attribute(
-            "mgp_pilot_id", mgp_pilot["pilotId"]
-        ):
-            pilot_id = ids[0]
+        pilots = self._pilots if self._pilots is not None else _PilotIndex(self._rhapi)
 
+        if (pilot_id := pilots.find(mgp_pilot["pilotId"])) is not None:
             if not update_attrs:
                 return pilot_id
 
@@ -79,6 +305,7 @@ class RaceSyncImporter:
             )
 
             pilot_id = db_pilot.id
+            pilots.add(mgp_pilot["pilotId"], pilot_id)
 
         attrs = {"mgp_pilot_id": mgp_pilot["pilotId"]}
 
@@ -96,7 +323,7 @@ class RaceSyncImporter:
                 }
             )
 
-        self._rhapi.db.pilot_alter(pilot_id, attributes=attrs)
+        pilots.update(mgp_pilot["pilotId"], attrs)
 
         return int(pilot_id)
 
@@ -162,25 +389,19 @@ class RaceSyncImporter:
         database
         :return: The id of the frequency set
         """
-        imported_set = json.dumps(frequencyset)
-        frequencyset_names = []
-
-        profiles: list[Profiles] = self._rhapi.db.frequencysets
-        for profile in profiles:
-            frequencyset_names.append(profile.name)
-            if profile.frequencies == imported_set:
-                self._rhapi.db.option_set("currentProfile", profile.id)
-                break
+        profiles = self._profiles
+        if profiles is None:
+            profiles = _ProfileIndex(self._rhapi)
+            if self._pilots is not None:
+                # Keep the index for the rest of the import session
+                self._profiles = profiles
+
+        if (profile_id := profiles.find(frequencyset)) is not None:
+            self._rhapi.db.option_set("currentProfile", profile_id)
         else:
-            index = 1
-            base = "MultiGP Profile"
-            while f"{base} {index}" in frequencyset_names:
-                index += 1
-            profile = self._rhapi.db.frequencyset_add(
-                name=f"{base} {index}", frequencies=imported_set
-            )
+            profile_id = profiles.add(frequencyset)
 
-        return int(profile.id)
+        return int(profile_id)
 
     def import_pilots(self, _args: Union[dict, None] = None) -> None:
         """
@@ -202,8 +423,9 @@ class RaceSyncImporter:
             self._rhapi.ui.message_notify(self._rhapi.language.__(message))
             return
 
-        for mgp_pilot in race_data["entries"]:
-            self.pilot_search(mgp_pilot, update_attrs=True)
+        with self.import_session():
+            for mgp_pilot in race_data["entries"]:
+                self.pilot_search(mgp_pilot, update_attrs=True)
 
         self._rhapi.ui.broadcast_pilots()
         message = "Pilots imported"
@@ -277,62 +499,87 @@ class RaceSyncImporter:
 
         return format_id, mgp_format
 
+    def _plan_heat(
+        self, heat: dict[str, list], num_seats: int
+    ) -> tuple[list[Union[int, None]], int]:
+        """
+        Resolve the pilots and frequency profile of a MultiGP heat
+
+        :param heat: The heat data from MultiGP
+        :param num_seats: The number of seats on the timer
+        :return: The pilot id of each entry, or None for empty entries,
+        and the frequency profile id
+        """
+        pilots: list[Union[int, None]] = []
+        frequencyset: dict[str, list] = {"b": [], "c": [], "f": []}
+
+        for mgp_pilot in heat["entries"]:
+            if "pilotId" in mgp_pilot:
+                pilots.append(self.pilot_search(mgp_pilot))
+            else:
+                pilots.append(None)
+
+            frequencyset["b"].append(mgp_pilot["band"])
+            if mgp_pilot["channel"]:
+                frequencyset["c"].append(int(mgp_pilot["channel"]))
+            else:
+                frequencyset["c"].append(None)
+            frequencyset["f"].append(int(mgp_pilot["frequency"]))
+
+        for _ in range(len(heat["entries"]), num_seats):
+            frequencyset["b"].append(None)
+            frequencyset["c"].append(None)
+            frequencyset["f"].append(0)
+
+        return pilots, self.fprofile_search(frequencyset)
+
     def _setup_raceclass_heats(
         self,
         raceclass_id: RaceClass,
         heat_data: list,
         heat_name: Union[str, None] = None,
+        attributes: Union[dict[str, T], None] = None,
     ) -> Heat:
         """
-        Setup heats for imported raceclass
+        Setup heats for imported raceclass. Pilots and frequency profiles
+        for every heat are resolved before any heat is created. Each heat is
+        then added and altered once, and pilot assignments for every heat
+        are written in a single batch.
 
         :param race_class: The raceclass to save to
         :param heats: The heat data from MultiGP
+        :param heat_name: Name to use for every heat instead of the heat number
+        :param attributes: Additional attributes to set on every heat
         :return: The last heat generated from the schedule
         """
+        num_seats = len(self._rhapi.interface.seats)
+        with self.import_session():
+            plans = [self._plan_heat(heat, num_seats) for heat in heat_data]
 
         slot_list = []
 
-        for hindex, heat in enumerate(heat_data):
-            heat_data: Heat = self._rhapi.db.heat_add(
+        for hindex, (pilots, fprofile_id) in enumerate(plans):
+            heat: Heat = self._rhapi.db.heat_add(
                 name=f"Heat {hindex + 1}" if heat_name is None else heat_name,
                 raceclass=raceclass_id,
             )
-            rh_slots: list[HeatNode] = self._rhapi.db.slots_by_heat(heat_data.id)
-
-            frequencyset: dict[str, list] = {"b": [], "c": [], "f": []}
-            count = 0
+            rh_slots: list[HeatNode] = self._rhapi.db.slots_by_heat(heat.id)
 
-            for pindex, mgp_pilot in enumerate(heat["entries"]):
-                count += 1
-                if "pilotId" in mgp_pilot:
-                    db_pilot_id = self.pilot_search(mgp_pilot)
+            for pindex, pilot_id in enumerate(pilots):
+                if pilot_id is not None:
                     slot_list.append(
-                        {"slot_id": rh_slots[pindex].id, "pilot": db_pilot_id}
+                        {"slot_id": rh_slots[pindex].id, "pilot": pilot_id}
                     )
 
-                frequencyset["b"].append(mgp_pilot["band"])
-                if mgp_pilot["channel"]:
-                    frequencyset["c"].append(int(mgp_pilot["channel"]))
-                else:
-                    frequencyset["c"].append(None)
-                frequencyset["f"].append(int(mgp_pilot["frequency"]))
-
-            while count < len(self._rhapi.interface.seats):
-                count += 1
-                frequencyset["b"].append(None)
-                frequencyset["c"].append(None)
-                frequencyset["f"].append(0)
-
-            fprofile_id = self.fprofile_search(frequencyset)
             self._rhapi.db.heat_alter(
-                heat_data.id, attributes={"heat_profile_id": fprofile_id}
+                heat.id,
+                attributes={"heat_profile_id": fprofile_id, **(attributes or {})},
             )
 
         self._rhapi.db.slots_alter_fast(slot_list)
         self._rhapi.race.frequencyset = fprofile_id
 
-        return heat_data
+        return heat
 
     def _setup_populated_rounds(
         self,
@@ -399,6 +646,17 @@ class RaceSyncImporter:
         """
         Setup a new raceclass within the RHUI based on the import MultiGP race(s).
 
+        :param selected_race: The id of the MultiGP race
+        :param race_data: The imported race data
+        """
+        self.forget_zippyq_rounds(selected_race)
+        with self.import_session():
+            self._import_class(selected_race, race_data)
+
+    def _import_class(self, selected_race: int, race_data: dict[str, T]) -> None:
+        """
+        Setup a new raceclass from the imported race data
+
         :param selected_race: The id of the MultiGP race
         :param race_data: The imported race data
         """
@@ -467,54 +725,85 @@ class RaceSyncImporter:
 
             self._rhapi.db.option_set("zippyq_races", zippyq_races)
 
-    def zippyq(
-        self, raceclass_id: int, selected_race: str, round_num: int
-    ) -> Union[Heat, None]:
+    def _fetch_zippyq_round(
+        self,
+        raceclass_id: int,
+        selected_race: str,
+        round_num: int,
+        notify: bool = True,
+    ) -> Union[_ZippyQRound, None]:
         """
-        Imports a single ZippyQ round
+        Download and validate a single ZippyQ round. Starts from the last
+        known current round of the race, retrying from the requested round
+        if no rounds are found there. The current round is pulled again when
+        the first response starts from a different round.
 
-        :param raceclass_id: The raceclass to import the ZippyQ round into
-        :param selected_race: The MultiGP race to import the ZippyQ from
+        :param raceclass_id: The raceclass the round is for
+        :param selected_race: The MultiGP race to download the ZippyQ from
         :param round_num: The round number to pull from RaceSync
-        :return: The import ZippyQ round as a Heat or None if failed
-        to import.
+        :param notify: Notify the user if the round could not be downloaded
+        :return: The downloaded round or None if not avaliable
         """
 
+        def failed(message: str) -> None:
+            if notify:
+                self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+            return None
+
+        race_key = str(selected_race)
+        requested_round = round_num
+        round_num = max(round_num, self._current_rounds.get(race_key, 0))
         data: Union[dict[str, list], None] = self._multigp.pull_additional_rounds(
             selected_race, round_num
         )
 
+        if round_num != requested_round and (data is None or not data["rounds"]):
+            # The known current round may be stale. Start from the requested round
+            self._current_rounds.pop(race_key, None)
+            round_num = requested_round
+            data = self._multigp.pull_additional_rounds(selected_race, round_num)
+
         if data is None:
-            message = "Data not found when attempting to import ZippyQ round"
-            self._rhapi.ui.message_notify(self._rhapi.language.__(message))
-            return None
+            return failed("Data not found when attempting to import ZippyQ round")
 
         if not data["rounds"]:
-            message = "Additional ZippyQ rounds not found"
-            self._rhapi.ui.message_notify(self._rhapi.language.__(message))
-            return None
+            return failed("Additional ZippyQ rounds not found")
 
         current_round = int(data["rounds"][0]["currentRound"])
+
         if current_round != round_num:
             data = self._multigp.pull_additional_rounds(selected_race, current_round)
+
+            if data is None or not data["rounds"]:
+                return failed("Data not found when attempting to import ZippyQ round")
+
             round_num = current_round
 
-            if data is None:
-                message = "Data not found when attempting to import ZippyQ round"
-                self._rhapi.ui.message_notify(self._rhapi.language.__(message))
-                return None
+        self._current_rounds[race_key] = current_round
 
-        if not self._run_seat_check(data):
+        if notify and not self._run_seat_check(data):
             return None
 
-        heat_data = self._setup_raceclass_heats(
-            raceclass_id, data["rounds"][0]["heats"], data["rounds"][0]["name"]
+        return _ZippyQRound(
+            raceclass_id, requested_round, round_num, data, time.monotonic()
         )
 
-        attrs = {"zippyq_round_num": round_num, "downloaded_zippyq": "1"}
+    def _commit_zippyq_round(self, zippyq_round: _ZippyQRound) -> Heat:
+        """
+        Import a downloaded ZippyQ round into its raceclass
+
+        :param zippyq_round: The downloaded round
+        :return: The imported ZippyQ round as a Heat
+        """
+        round_num = zippyq_round.round_num
+        round_data = zippyq_round.data["rounds"][0]
+
         translation = self._rhapi.language.__("Round")
-        self._rhapi.db.heat_alter(
-            heat_data.id, name=f"{translation} {round_num}", attributes=attrs
+        heat_data = self._setup_raceclass_heats(
+            zippyq_round.raceclass_id,
+            round_data["heats"],
+            f"{translation} {round_num}",
+            {"zippyq_round_num": round_num, "downloaded_zippyq": "1"},
         )
 
         self._rhapi.ui.broadcast_pilots()
@@ -524,6 +813,155 @@ class RaceSyncImporter:
 
         return heat_data
 
+    def zippyq(
+        self, raceclass_id: int, selected_race: str, round_num: int
+    ) -> Union[Heat, None]:
+        """
+        Imports a single ZippyQ round
+
+        :param raceclass_id: The raceclass to import the ZippyQ round into
+        :param selected_race: The MultiGP race to import the ZippyQ from
+        :param round_num: The round number to pull from RaceSync
+        :return: The import ZippyQ round as a Heat or None if failed
+        to import.
+        """
+        zippyq_round = self._fetch_zippyq_round(raceclass_id, selected_race, round_num)
+        if zippyq_round is None:
+            return None
+
+        return self._commit_zippyq_round(zippyq_round)
+
+    def _next_zippyq_round(self, raceclass_id: int) -> int:
+        """
+        Get the number of the next ZippyQ round for a raceclass
+
+        :param raceclass_id: The ZippyQ raceclass
+        :return: The next round number
+        """
+        class_heats: list[Heat] = self._rhapi.db.heats_by_class(raceclass_id)
+        if not class_heats:
+            return 1
+
+        return (
+            int(
+                self._rhapi.db.heat_attribute_value(
+                    class_heats[-1].id, "zippyq_round_num"
+                )
+            )
+            + 1
+        )
+
+    def forget_zippyq_rounds(self, race_id: Union[str, int, None] = None) -> None:
+        """
+        Forget the known current ZippyQ round and any prefetched round.
+        Used when a race is imported again or the event data is cleared.
+
+        :param race_id: The MultiGP race to forget, defaults to every race
+        """
+        if race_id is None:
+            self._current_rounds.clear()
+        else:
+            self._current_rounds.pop(str(race_id), None)
+
+        self.stop_zippyq_prefetch()
+        self._prefetched = None
+
+    def _take_prefetched(
+        self, raceclass_id: int, round_num: int
+    ) -> Union[_ZippyQRound, None]:
+        """
+        Stop the prefetcher and take the round it downloaded if it is
+        the requested round and recent enough to use
+
+        :param raceclass_id: The ZippyQ raceclass
+        :param round_num: The requested round number
+        :return: The prefetched round, or None if not usable
+        """
+        self.stop_zippyq_prefetch()
+        zippyq_round, self._prefetched = self._prefetched, None
+
+        if (
+            zippyq_round is not None
+            and zippyq_round.raceclass_id == raceclass_id
+            and zippyq_round.requested_round == round_num
+            and time.monotonic() - zippyq_round.fetched <= ZIPPYQ_PREFETCH_MAX_AGE
+            and self._run_seat_check(zippyq_round.data)
+        ):
+            return zippyq_round
+
+        return None
+
+    def _prefetch_zippyq(
+        self,
+        stop: gevent.event.Event,
+        raceclass_id: int,
+        selected_race: str,
+        round_num: int,
+    ) -> None:
+        """
+        Poll RaceSync for the next ZippyQ round until stopped, keeping
+        the latest download ready to import
+
+        :param stop: Event for stopping the prefetcher
+        :param raceclass_id: The ZippyQ raceclass
+        :param selected_race: The MultiGP race to download the ZippyQ from
+        :param round_num: The round number to pull from RaceSync
+        """
+        deadline = time.monotonic() + ZIPPYQ_PREFETCH_TIMEOUT
+
+        while not stop.is_set() and time.monotonic() < deadline:
+            zippyq_round = self._fetch_zippyq_round(
+                raceclass_id, selected_race, round_num, notify=False
+            )
+            if zippyq_round is not None and not stop.is_set():
+                self._prefetched = zippyq_round
+
+            stop.wait(ZIPPYQ_POLL_INTERVAL)
+
+    def start_zippyq_prefetch(self, _args: Union[dict, None] = None) -> None:
+        """
+        Start downloading the next ZippyQ round in the background when a
+        race in a ZippyQ class starts
+
+        :param _args: Args passed from the event call, defaults to None
+        """
+        if self._rhapi.db.option("auto_zippy") != "1":
+            return
+
+        heat: Union[Heat, None] = self._rhapi.db.heat_by_id(self._rhapi.race.heat)
+        if heat is None or not heat.class_id:
+            return
+
+        if (
+            self._rhapi.db.raceclass_attribute_value(heat.class_id, "mgp_mode")
+            != MGPMode.ZIPPYQ
+        ):
+            return
+
+        self.stop_zippyq_prefetch()
+        self._prefetched = None
+        self._prefetch_stop = gevent.event.Event()
+
+        selected_race = self._rhapi.db.raceclass_attribute_value(
+            heat.class_id, "mgp_raceclass_id"
+        )
+        self._prefetcher = gevent.spawn(
+            self._prefetch_zippyq,
+            self._prefetch_stop,
+            heat.class_id,
+            selected_race,
+            self._next_zippyq_round(heat.class_id),
+        )
+
+    def stop_zippyq_prefetch(self, _args: Union[dict, None] = None) -> None:
+        """
+        Stop downloading the next ZippyQ round in the background
+
+        :param _args: Args passed from the event call, defaults to None
+        """
+        self._prefetch_stop.set()
+        self._prefetcher = None
+
     def manual_zippyq(self, _args: Union[dict, None] = None) -> None:
         """
         Used to manually trigger a ZippyQ import from the RHUI
@@ -547,17 +985,9 @@ class RaceSyncImporter:
                 class_id, "mgp_raceclass_id"
             )
 
-            class_heats: list[Heat] = self._rhapi.db.heats_by_class(class_id)
-            if class_heats:
-                last_round_num = int(
-                    self._rhapi.db.heat_attribute_value(
-                        class_heats[-1].id, "zippyq_round_num"
-                    )
-                )
-            else:
-                last_round_num = 0
-
-            heat_data = self.zippyq(class_id, selected_race, last_round_num + 1)
+            heat_data = self.zippyq(
+                class_id, selected_race, self._next_zippyq_round(class_id)
+            )
             if heat_data is None:
                 return
 
@@ -583,26 +1013,24 @@ class RaceSyncImporter:
                 != MGPMode.ZIPPYQ
                 or self._rhapi.db.option("auto_zippy") != "1"
             ):
+                self.stop_zippyq_prefetch()
                 return
 
-            message = "Automatically downloading next ZippyQ round..."
-            self._rhapi.ui.message_notify(self._rhapi.language.__(message))
+            round_num = self._next_zippyq_round(class_id)
 
-            class_heats = self._rhapi.db.heats_by_class(class_id)
+            if zippyq_round := self._take_prefetched(class_id, round_num):
+                heat_data = self._commit_zippyq_round(zippyq_round)
+            else:
+                message = "Automatically downloading next ZippyQ round..."
+                self._rhapi.ui.message_notify(self._rhapi.language.__(message))
 
-            last_round_num = int(
-                self._rhapi.db.heat_attribute_value(
-                    class_heats[-1].id, "zippyq_round_num"
+                selected_race = self._rhapi.db.raceclass_attribute_value(
+                    class_id, "mgp_raceclass_id"
                 )
-            )
 
-            selected_race = self._rhapi.db.raceclass_attribute_value(
-                class_id, "mgp_raceclass_id"
-            )
-
-            heat_data = self.zippyq(class_id, selected_race, last_round_num + 1)
-            if heat_data is None:
-                return
+                heat_data = self.zippyq(class_id, selected_race, round_num)
+                if heat_data is None:
+                    return
 
             if self._rhapi.db.option("active_import") == "1":
                 self._rhapi.race.heat = heat_data.id
@@ -256,6 +256,29 @@ class UImanager:
         else:
             self._rhapi.fields.register_option(fpv_scores_auto)
 
+        force_push_text = self._rhapi.language.__("Force Full Results Push")
+        force_push = UIField(
+            "mgp_force_push",
+            force_push_text,
+            desc="Push every slot to MultiGP, including slots unchanged since the last push",
+            value=False,
+            field_type=UIFieldType.CHECKBOX,
+        )
+        self._rhapi.fields.register_option(force_push, "results_controls")
+
+        dry_run_text = self._rhapi.language.__("Dry Run Results Push")
+        dry_run = UIField(
+            "mgp_dry_run",
+            dry_run_text,
+            desc=(
+                "Write the results that would be pushed to a file in the "
+                "data directory instead of sending them to MultiGP"
+            ),
+            value=False,
+            field_type=UIFieldType.CHECKBOX,
+        )
+        self._rhapi.fields.register_option(dry_run, "results_controls")
+
         self.results_class_selector()
 
         self._rhapi.ui.register_quickbutton(
@@ -338,6 +361,9 @@ class UImanager:
 
         :param args: args passed as the button callback, defaults to None
         """
+        if args is not None and "refreshed" in args:
+            self._multigp.clear_cache()
+
         mgp_races = self._multigp.pull_races()
         race_list = [UIFieldSelectOption(value=None, label="")]
 